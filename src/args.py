@@ -2,6 +2,7 @@
 
 import argparse
 from const import FORM
+from settings import NET_PORT, NET_TICK_RATE, NET_KEYFRAME, WINDOWED, VSYNC, MATCH_LENGTH, MATCH_HALVES, TURBO_DRAW_FPS
 
 def get_args():
     parser = argparse.ArgumentParser(description='Play Fifa-42')
@@ -20,13 +21,40 @@ def get_args():
                        metavar="[0-100]", default=42,
                        help='Game difficulty (0-100)')
 
-    parser.add_argument('--opponent', choices={'random', 'AI'},
+    parser.add_argument('--opponent', choices={'random', 'AI', 'planning'},
                         default='AI',
                         help='Choose your opponent')
 
     parser.add_argument('--fps', type=int, default=42,
                         help='Play the game without displaying the menu')
 
+    parser.add_argument('--match_length', type=float, default=MATCH_LENGTH,
+                        help='Length of a match (in minutes, at the chosen fps), 0 to play forever')
+
+    parser.add_argument('--halves', type=int, default=MATCH_HALVES,
+                        help='Number of halves in a match')
+
+    parser.add_argument('--turbo', action='store_true', default=False,
+                        help='Start in turbo mode i.e. as fast as possible (toggle with T)')
+
+    parser.add_argument('--draw_every', type=int, default=0,
+                        help='In turbo mode, draw every Nth frame (by default, draw --draw_fps frames per second)')
+
+    parser.add_argument('--draw_fps', type=int, default=TURBO_DRAW_FPS,
+                        help='In turbo mode, frames shown per second')
+
+    parser.add_argument('--demo', action='store_true', default=False,
+                        help='Team 1 is played by the AI too (watch AI vs AI)')
+
+    parser.add_argument('--windowed', action='store_true', default=WINDOWED,
+                        help='Play in a (resizable) window instead of fullscreen')
+
+    parser.add_argument('--vsync_off', action='store_true', default=not VSYNC,
+                        help='Do not wait for the monitor\'s refresh (may tear)')
+
+    parser.add_argument('--heatmap_out', type=str, default=None,
+                        help='Export the match heatmaps (JSON) to this file when the game ends')
+
     forms = set(FORM.keys())
     parser.add_argument('--team1_form', choices=forms,
                         metavar="{'default', 'balanced-1/2' , 'attacking-1/2/3', 'defensive-1/2/3'}",
@@ -38,5 +66,83 @@ def get_args():
                         default='default',
                         help='Team 2\'s formation')
 
+    parser.add_argument('--connect', type=str, default=None, metavar='HOST[:PORT]',
+                        help='Play on a game server instead of locally')
+
+    parser.add_argument('--team', type=int, choices={0, 1, 2}, default=1,
+                        help='Team to control when connected to a server (0 to spectate)')
+
+    args = parser.parse_args()
+    return args
+
+def get_server_args():
+    parser = argparse.ArgumentParser(description='Run a Fifa-42 game server')
+
+    parser.add_argument('--host', type=str, default='0.0.0.0',
+                        help='Address to listen on')
+
+    parser.add_argument('--port', type=int, default=NET_PORT,
+                        help='Port to listen on')
+
+    parser.add_argument('--tick_rate', type=int, default=NET_TICK_RATE,
+                        help='Frames simulated per second')
+
+    parser.add_argument('--difficulty', type=int, choices=range(0,101),
+                       metavar="[0-100]", default=42,
+                       help='Game difficulty (0-100)')
+
+    parser.add_argument('--broadcast', action='store_true', default=False,
+                        help='Stream the match to spectators (remote teams are replaced by the AI)')
+
+    for team in ('team1', 'team2'):
+        parser.add_argument(f'--{team}', choices={'remote', 'AI', 'random'},
+                            default='remote',
+                            help=f'Who controls {team} (remote clients join with --team)')
+
+    args = parser.parse_args()
+    return args
+
+def get_rollback_args():
+    parser = argparse.ArgumentParser(description='Check that rolling back and re-simulating frames is deterministic')
+
+    parser.add_argument('--frames', type=int, default=1000,
+                        help='Frames played (a rollback to the oldest saved frame is checked every ROLLBACK_FRAMES)')
+
+    parser.add_argument('--seed', type=int, default=0,
+                        help='Seed of the random number generator')
+
+    args = parser.parse_args()
+    return args
+
+def get_loopback_args():
+    parser = argparse.ArgumentParser(description='Check the network code over localhost (a server and 2 clients)')
+
+    parser.add_argument('--ticks', type=int, default=2*NET_KEYFRAME,
+                        help='Ticks played by the server (the default covers 2 keyframes)')
+
+    parser.add_argument('--tick_rate', type=int, default=NET_TICK_RATE,
+                        help='Frames simulated per second')
+
+    args = parser.parse_args()
+    return args
+
+def get_stress_args():
+    parser = argparse.ArgumentParser(description='Measure how Fifa-42 scales with the number of players (N vs N)')
+
+    parser.add_argument('--players', type=int, nargs='+', default=[11, 22, 50, 100, 200],
+                        help='Squad sizes to measure')
+
+    parser.add_argument('--frames', type=int, default=300,
+                        help='Frames played for every squad size')
+
+    parser.add_argument('--render_every', type=int, default=10,
+                        help='Draw the game every these many frames')
+
+    parser.add_argument('--seed', type=int, default=0,
+                        help='Seed of the random number generator')
+
+    parser.add_argument('--worker', action='store_true', default=False,
+                        help=argparse.SUPPRESS)
+
     args = parser.parse_args()
     return args
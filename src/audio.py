@@ -0,0 +1,141 @@
+"""
+Central audio service
+
+All in-game sounds are played through the ```audio``` object defined here:
+
+- The mixer is initialized (and every sound is loaded) exactly once, when the first sound is played,
+  so entry points that never play a sound (e.g. headless servers) never open the audio device
+- Each sound category gets its own reserved channels (see ```SOUND_CHANNELS```)
+- Categories are rate limited (see ```SOUND_RATE_LIMIT```) and steal their oldest voice when all channels are busy
+- Requests are queued during the simulation and only played when ```flush()``` is called by the render loop
+- Without an audio device (e.g. on a headless server) every call does nothing
+"""
+
+from settings import *
+from pygame import mixer
+from collections import OrderedDict
+
+# name: (path, category)
+SOUNDS = {
+    'applause': (APPLAUSE, 'crowd'),
+    'kick': (KICK, 'kick'),
+    'short_whistle': (SINGLE_SHORT_WHISTLE, 'whistle'),
+    'long_whistle': (SINGLE_LONG_WHISLTE, 'whistle'),
+    'three_whistles': (THREE_WHISTLES, 'whistle'),
+    'goal': (GOAL, 'goal'),
+    'bounce': (BOUNCE, 'bounce'),
+    'boo': (BOOING, 'boo'),
+    'menu': (MENU_MUSIC, 'music'),
+}
+
+
+class Audio:
+    """
+    Plays sounds on reserved per-category channels
+    """
+
+    def __init__(self):
+        """
+        Initializes the audio service (the mixer is only initialized by ```init()```)
+        """
+        self.channels = {}
+        self.sounds = {}
+        self.started = {} # time at which each channel started playing (used for voice stealing)
+        self.last = {category: -math.inf for category in SOUND_CHANNELS} # time each category was last played
+        self.queue = OrderedDict() # sounds to play on the next flush (name: loops)
+        self.enabled = None # None until the mixer is initialized
+
+    def init(self):
+        """
+        Initializes the mixer, reserves channels for each category and preloads all sounds (only once)
+
+        If the mixer can not be initialized, audio is disabled (no sounds are loaded)
+        """
+        if self.enabled is not None:
+            return
+        try:
+            mixer.init(44100, -16, 2, 2048)
+        except pygame.error:
+            self.enabled = False
+            return
+        self.enabled = True
+
+        mixer.set_num_channels(sum(SOUND_CHANNELS.values()))
+        mixer.set_reserved(sum(SOUND_CHANNELS.values()))  # Never used by Sound.play()
+
+        i = 0
+        for category, num in SOUND_CHANNELS.items():
+            self.channels[category] = [mixer.Channel(i + j) for j in range(num)]
+            i += num
+
+        # Sounds whose files are missing from the assets are skipped (and never played)
+        self.sounds = {name: mixer.Sound(path) for name, (path, category) in SOUNDS.items()
+                       if os.path.exists(path)}
+
+    def play(self, name, loops=0):
+        """
+        Queue a sound to be played on the next ```flush()```
+
+        Attributes:
+            name (str): Name of the sound (must be a key of ```SOUNDS```)
+            loops (int): Number of times to repeat the sound (-1 loops forever)
+
+        The same sound is only queued once per flush (the first call initializes the mixer)
+        """
+        self.init()
+        if name in self.sounds and name not in self.queue:
+            self.queue[name] = loops
+
+    def channel(self, category):
+        """
+        Return a free channel for the category, otherwise steal the one that has been playing the longest
+        """
+        channels = self.channels[category]
+        for ch in channels:
+            if not ch.get_busy():
+                return ch
+        return min(channels, key=lambda ch: self.started.get(ch, 0))
+
+    def flush(self):
+        """
+        Play all the queued sounds
+
+        Sounds of a category that was played less than ```SOUND_RATE_LIMIT``` ms ago are dropped
+        """
+        now = pygame.time.get_ticks()
+        while self.queue:
+            name, loops = self.queue.popitem(last=False)
+            category = SOUNDS[name][1]
+            if now - self.last[category] < SOUND_RATE_LIMIT.get(category, 0):
+                continue
+
+            ch = self.channel(category)
+            ch.play(self.sounds[name], loops=loops)
+            self.started[ch] = now
+            self.last[category] = now
+
+    def pause(self):
+        """
+        Pause every channel and drop the queued sounds
+        """
+        self.queue.clear()
+        if self.enabled:
+            mixer.pause()
+
+    def resume(self):
+        """
+        Resume every paused channel
+        """
+        if self.enabled:
+            mixer.unpause()
+
+    def stop(self):
+        """
+        Stop every channel and drop the queued sounds
+        """
+        self.queue.clear()
+        if self.enabled:
+            mixer.stop()
+
+
+audio = Audio()
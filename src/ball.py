@@ -3,15 +3,8 @@ Define the football used in the game
 """
 
 from settings import *
-from const import ACT
-from pygame import mixer
-
-# Init Sounds
-mixer.init(44100, -16,2,2048)
-single_short_whistle = mixer.Sound(SINGLE_SHORT_WHISTLE)
-goal_sound = mixer.Sound(GOAL)
-bounce = mixer.Sound(BOUNCE)
-boo_sound = mixer.Sound(BOOING)
+from const import ACT_DIR, ACT_IS_SHOT
+from audio import audio
 
 class Ball:
     """
@@ -30,6 +23,7 @@ class Ball:
         self.sound = sound
         self.free = True
         self.color = (50,50,50)
+        self.resets = 0 # Number of times the ball went over an end line (goal or not)
         self.ball_stats = {
             'last_player': -1,
             'last_team': -1,
@@ -90,14 +84,15 @@ class Ball:
 
                 # Play celebration sound
                 if self.sound:
-                    single_short_whistle.play()
-                    goal_sound.play()
+                    audio.play('short_whistle')
+                    audio.play('goal')
 
                 goal = True
                 stats.goals[3-side] += 1 # maps 1 -> 2, 2 -> 1 bcoz the goal goes to the other side!
                 pos = P(W//2, H//2)
 
         if reset:
+            self.resets += 1
             self.update_stats(stats, goal=goal, side=side)
             self.reset(pos)
         return goal
@@ -143,37 +138,124 @@ class Ball:
             else:
                 stats.shot_acc[self.ball_stats['team']]['fail'] += 1
                 if self.sound:
-                    boo_sound.play() # Play when missed shot
+                    audio.play('boo') # Play when missed shot
+
+    def contact(self, team1, team2, vx, vy, t, end):
+        """
+        Find the first player touched by the (free) ball between two instants of the current frame
+
+        Attributes:
+            team1 (Team): Team facing right
+            team2 (Team): Team facing left
+            vx, vy (float): Distance covered by the ball in the whole frame (at its current velocity)
+            t (float): Instant (fraction of the frame) at which the ball is at ```pos```
+            end (float): Last instant to check
+
+        Players move in a straight line from ```prev_pos``` to ```pos``` during the frame,
+        the earliest instant at which the two circles touch is found by solving a quadratic equation
+        (swept circles) so the ball can not pass through a player however far it moves in a frame
 
-    def ball_player_collision(self, team, stats):
+        Returns (instant, player), (None, None) if no player is touched
+        """
+        r = PLAYER_RADIUS + BALL_RADIUS
+        r2 = r*r
+        bx, by, span = self.pos.x, self.pos.y, end - t
+        first, touched = None, None
+        for team in (team1, team2):
+            for player in team.players:
+                x0, y0 = player.prev_pos
+                pos = player.pos
+                ux, uy = pos.x - x0, pos.y - y0  # Player's motion in the frame
+                dx, dy = bx - x0 - t*ux, by - y0 - t*uy  # Relative position at instant t
+                wx, wy = vx - ux, vy - uy  # Relative motion
+                ex, ey = dx + span*wx, dy + span*wy  # Relative position at instant end
+                if (dx > r and ex > r) or (dx < -r and ex < -r) or (dy > r and ey > r) or (dy < -r and ey < -r):
+                    continue  # Too far apart on one of the axes during the whole interval
+                c = dx*dx + dy*dy - r2
+                if c < 0:  # Already touching
+                    s = 0
+                else:
+                    a = wx*wx + wy*wy
+                    b = 2*(dx*wx + dy*wy)
+                    if a == 0 or b >= 0:  # Not getting closer
+                        continue
+                    disc = b*b - 4*a*c
+                    if disc < 0:  # Passes by
+                        continue
+                    s = (-b - math.sqrt(disc))/(2*a)
+                if t + s <= end and (first is None or t + s < first):
+                    first, touched = t + s, player
+        return first, touched
+
+    def sweep(self, team1, team2, stats, dt=1):
         """
-        Check if the ball has been captured by a player
+        Move the free ball along its path for ```dt``` frames, the first player it touches captures it
+
+        The ball bounces off the side lines and stops on the end lines (see ```goal_check()```).
+        With ```dt``` = 0 the ball does not move but still checks if it touches a player
+
+        This only keeps large steps from tunneling through players, it does not make them equivalent to ```dt``` steps
+        of 1 frame (players move in a straight line for the whole step and decide again only after it)
 
         Attributes:
-            team (Team): The team for which to check
+            team1 (Team): Team facing right
+            team2 (Team): Team facing left
             stats (Stats):  Keep track of game statistics for the pause menu
+            dt (int): Number of frames
         """
-        for player in team.players:
-            if self.pos.dist(player.pos) < PLAYER_RADIUS + BALL_RADIUS:
+        t = 0  # Fraction of the frame already simulated
+        while True:
+            vx, vy = BALL_SPEED*dt*self.vel.x, BALL_SPEED*dt*self.vel.y
+
+            wall, axis = 1, None  # First side / end line reached (instant, axis)
+            if vx:
+                s = ((BALL_RADIUS if vx < 0 else W - BALL_RADIUS) - self.pos.x)/vx
+                if t + max(s, 0) <= wall:
+                    wall, axis = t + max(s, 0), 'x'
+            if vy:
+                s = ((BALL_RADIUS if vy < 0 else H - BALL_RADIUS) - self.pos.y)/vy
+                if t + max(s, 0) < wall or (axis is None and t + max(s, 0) <= wall):
+                    wall, axis = t + max(s, 0), 'y'
+
+            first, player = self.contact(team1, team2, vx, vy, t, wall)
+            if player is not None:  # Captured (the ball stops where it touched the player)
+                self.pos = P(self.pos.x + (first - t)*vx, self.pos.y + (first - t)*vy)
                 self.vel = P(0,0)
                 self.free = False
                 self.dir = player.walk_dir
                 self.update_stats(stats, player=player)
+                return
+
+            self.pos = P(min(max(BALL_RADIUS, self.pos.x + (wall - t)*vx), W - BALL_RADIUS),
+                         min(max(BALL_RADIUS, self.pos.y + (wall - t)*vy), H - BALL_RADIUS))
+            if axis is None:
+                return
+
+            if self.sound:
+                audio.play('bounce') # Bounce sound
+            if axis == 'x':  # Ball X overflow (the ball is reset by goal_check())
+                self.vel.x *= (-1) # Flip X velocity
+                return
+            self.vel.y *= (-1) # Ball Y overflow, flip Y velocity
+            t = wall
 
-    def check_capture(self, team1, team2, stats):
+    def check_capture(self, team1, team2, stats, dt=0):
         """
         If the ball is not free, move the ball along with the player rather than on it's own
 
+        Otherwise move the free ball (see ```sweep()```)
+
         Attributes:
             team1 (Team): Team facing right
             team2 (Team): Team facing left
             stats (Stats):  Keep track of game statistics for the pause menu
+            dt (int): Number of frames the free ball moves for
         """
 
         if self.ball_stats['team'] == 1:
-            player = team1.players[self.ball_stats['player']]
+            player = team1.players[team1.index[self.ball_stats['player']]]
         elif self.ball_stats['team'] == 2:
-            player = team2.players[self.ball_stats['player']]
+            player = team2.players[team2.index[self.ball_stats['player']]]
 
         if not self.free:
             self.dir = player.walk_dir
@@ -183,55 +265,43 @@ class Ball:
                 self.pos = player.pos + BALL_OFFSET*BALL_CENTER
 
         else:
-            self.ball_player_collision(team1, stats)
-            self.ball_player_collision(team2, stats)
+            self.sweep(team1, team2, stats, dt)
 
-    def update(self, team1, team2, action1, action2, stats):
+    def update(self, team1, team2, action1, action2, stats, dt=1):
         """
         Update the ball's (in-game) state according to specified action
         Attributes:
             team1 (Team): Team facing right
             team2 (Team): Team facing left
-            action1 (list): Actions of team 1
-            action2 (list): Actions of team 2
+            action1 (list): Actions of team 1 (```Action``` codes)
+            action2 (list): Actions of team 2 (```Action``` codes)
             stats (Stats):  Keep track of game statistics for the pause menu
+            dt (int): Number of frames simulated at once (see ```Game```)
 
         Calls ```check_capture()``` and ```goal_check()```
         """
 
         if self.ball_stats['team'] == 1:
-            a = action1[self.ball_stats['player']]
+            a = action1[team1.index[self.ball_stats['player']]]
         elif self.ball_stats['team'] == 2:
-            a = action2[self.ball_stats['player']]
-
-        if self.free:
-            self.pos += P(BALL_SPEED,BALL_SPEED)*self.vel
-            if not (BALL_RADIUS <= self.pos.x <= W - BALL_RADIUS): # Ball X overflow
-                self.pos.x = min(max(BALL_RADIUS, self.pos.x),W - BALL_RADIUS)
-                self.vel.x *= (-1) # Flip X velocity
-                if self.sound:
-                    bounce.play() # Bounce sound
-
-            if not(BALL_RADIUS <= self.pos.y <= H - BALL_RADIUS): # Ball Y overflow
-                self.pos.y = min(max(BALL_RADIUS, self.pos.y),H - BALL_RADIUS)
-                self.vel.y *= (-1) # Flip Y velocity
-                if self.sound:
-                    bounce.play() # Bounce sound
-
+            a = action2[team2.index[self.ball_stats['player']]]
 
-        elif a in ['SHOOT_Q', 'SHOOT_W', 'SHOOT_E', 'SHOOT_A', 'SHOOT_D', 'SHOOT_Z', 'SHOOT_X', 'SHOOT_C']: # Player shoots
-            self.vel = P(ACT[a])
+        moving = self.free # A ball that is shot only starts moving on the next frame
+        if not self.free and ACT_IS_SHOT[a]: # Player shoots
+            self.vel = P(ACT_DIR[a])
             self.free = True
+            if self.sound:
+                audio.play('kick')
             # Ball relearse mechanics (when player shoots)
             const = PLAYER_RADIUS + BALL_RADIUS + 1
-            if self.dir == 'R' and ACT[a].x >= 0:
+            if self.dir == 'R' and ACT_DIR[a].x >= 0:
                 self.pos.x += const - BALL_RADIUS*BALL_OFFSET.x
-            elif self.dir == 'R' and ACT[a].x < 0:
+            elif self.dir == 'R' and ACT_DIR[a].x < 0:
                 self.pos.x -= const + BALL_RADIUS*BALL_OFFSET.x
-            elif self.dir == 'L' and ACT[a].x > 0:
+            elif self.dir == 'L' and ACT_DIR[a].x > 0:
                 self.pos.x += const + BALL_RADIUS*BALL_OFFSET.x
-            elif self.dir == 'L' and ACT[a].x <= 0:
+            elif self.dir == 'L' and ACT_DIR[a].x <= 0:
                 self.pos.x -= const - BALL_RADIUS*BALL_OFFSET.x
 
-        self.check_capture(team1, team2, stats)
+        self.check_capture(team1, team2, stats, dt if moving else 0)
         self.goal_check(stats)
@@ -4,9 +4,14 @@ Implementation of the game's camera
 
 from point import P
 from settings import *
+import numpy as np
 
 class Camera:
-    """ Class to draw different camera angles """
+    """
+    Class to draw different camera angles
+
+    Maps the field (fixed logical units, see ```W``` and ```H```) to the screen (```SCREEN_W``` x ```SCREEN_H```)
+    """
 
     def __init__(self, cx, cy, mode='default'):
         '''
@@ -24,17 +29,12 @@ class Camera:
             mode (str): The camera mode
         '''
         self.c = P(cx,cy)
-        self.set_mode(mode)
+        self.set_mode(mode)  # also caches the view rectangle and transform
 
     @property
     def params(self):
-        ''' Helper  method to reduce code redundancy '''
-        if self.mode == 'full':
-            return {'pt': P(0,0), 'fact': 1}
-        elif self.mode == 'default':
-            return {'pt': CAM_DEF, 'fact': DEF_FACTOR}
-        else:
-            return {'pt': CAM_ZOOM, 'fact': ZOOM_FACTOR}
+        ''' Helper  method to reduce code redundancy (cached when the mode is set) '''
+        return self._params
 
     def set_mode(self, mode):
         ''' Set the camera's mode. Mode must be one of ['full', 'default', 'zoomed'] '''
@@ -43,6 +43,28 @@ class Camera:
             raise Exception(f'Camera mode {mode} not recognized')
 
         self.mode = mode
+        if self.mode == 'full':
+            self._params = {'pt': P(0,0), 'fact': 1}
+        elif self.mode == 'default':
+            self._params = {'pt': CAM_DEF, 'fact': DEF_FACTOR}
+        else:
+            self._params = {'pt': CAM_ZOOM, 'fact': ZOOM_FACTOR}
+        self.fact = self._params['fact']*DISPLAY_SCALE  # screen pixels per field unit
+        self.update_transform()
+
+    def update_transform(self):
+        '''
+        Cache the camera's view rectangle and world-to-screen transform
+
+        A point p is drawn at ```fact*p + offset```. Called whenever the camera moves or changes mode
+        '''
+        if self.mode == 'full':  # whole field, centered on the screen
+            self.view = (0,0,W,H)
+            self.offset = P((SCREEN_W - self.fact*W)/2, (SCREEN_H - self.fact*H)/2)
+        else:
+            w, h = SCREEN_W/self.fact, SCREEN_H/self.fact
+            self.view = (self.c.x - w/2, self.c.y - h/2, w, h)
+            self.offset = P(SCREEN_W/2 - self.fact*self.c.x, SCREEN_H/2 - self.fact*self.c.y)
 
     def move(self, bx, by, alpha=P(0.9,0.9)):
         '''
@@ -50,23 +72,33 @@ class Camera:
 
         Uses exponential smoothing to minimize jittering
         '''
-        new_c = P(0,0)
-        new_c.x = min(max(bx, self.params['pt'].x//4), W - self.params['pt'].x//4)
-        new_c.y = min(max(by, self.params['pt'].y//4), H - self.params['pt'].y//4)
+        pt = self._params['pt']
+        new_x = min(max(bx, pt.x//4), W - pt.x//4)
+        new_y = min(max(by, pt.y//4), H - pt.y//4)
 
-        self.c = alpha*self.c + (P(1,1)-alpha)*new_c
+        self.c = P(alpha.x*self.c.x + (1-alpha.x)*new_x, alpha.y*self.c.y + (1-alpha.y)*new_y)
+        self.update_transform()
 
     def pt(self, p):
         ''' Transform any 2-D point with respect to the camera'''
         p = P(p)
-        return p if self.mode == 'full' else P(W/2,H/2) + P(self.params['fact'],self.params['fact'])*(p-self.c)
+        return P(self.fact*p.x + self.offset.x, self.fact*p.y + self.offset.y)
+
+    def pts(self, pts):
+        '''
+        Transform an array of 2-D points with respect to the camera (all at once)
+
+        Attributes:
+            pts (np.ndarray): Array of shape (N, 2) containing world coordinates
+
+        Returns a new array of shape (N, 2) containing screen coordinates
+        '''
+        pts = np.asarray(pts, dtype=float)
+        return self.fact*pts + (self.offset.x, self.offset.y)
 
     def rect_in_view(self, r1):
         ''' Check if given rectangle is within the camera's view '''
-        r2 = (0,0,W,H)
-        if self.mode != 'full':
-            r2 = (self.c.x - self.params['pt'].x//2, self.c.y - self.params['pt'].y//2,
-                self.params['pt'].x, self.params['pt'].y)
+        r2 = self.view
 
         lx = max(r1[0], r2[0])
         rx = min(r1[0] + r1[2], r2[0] + r2[2])
@@ -77,51 +109,30 @@ class Camera:
 
     def circle_in_view(self, x, y, rad):
         ''' Check if given circle is within the camera's view '''
-        r = (0,0,W,H)
-        if self.mode != 'full':
-            r = (self.c.x - self.params['pt'].x//2, self.c.y - self.params['pt'].y//2,
-                self.params['pt'].x, self.params['pt'].y)
-
-        cx = abs(x - (r[0]-r[2]/2))
-        cy = abs(y - (r[1]-r[3]/2))
-
-        if x > r[2]/2 + rad or y > r[3]/2 + rad:
-            return False
-
-        if x <= r[2]/2 or y <= r[3]/2:
-            return True
+        r = self.view
 
-        cornerDistance_sq = (x - r[2]/2)**2 + (y - r[3]/2)**2
+        # Distance from the circle's center to the nearest point of the view rectangle
+        dx = x - min(max(x, r[0]), r[0] + r[2])
+        dy = y - min(max(y, r[1]), r[1] + r[3])
 
-        return cornerDistance_sq <= rad**2
+        return dx*dx + dy*dy <= rad*rad
 
     def rect(self, win, col, coords, width=0):
         ''' Draw a rectangle according to the cameras mode (attributes are same as ```pygame.draw.rect```)'''
-        if self.mode == 'full':
-            pygame.draw.rect(win, col, coords, width)
-        elif self.rect_in_view(coords):
+        if self.rect_in_view(coords):
             x,y,w,h = coords
             new_pt = self.pt(P(x,y))
-            pygame.draw.rect(win, col, (new_pt.x, new_pt.y, w*self.params['fact'], h*self.params['fact']), width)
+            pygame.draw.rect(win, col, (new_pt.x, new_pt.y, w*self.fact, h*self.fact), width)
 
     def circle(self, win, col, p, r, width=0):
         ''' Draw a circle according to the cameras mode (attributes are same as ```pygame.draw.cirlce```)'''
-        if self.mode == 'full':
-            pygame.draw.circle(win, col, p, r, width)
-        #elif self.circle_in_view(p[0], p[1], r):
-        else:
+        if self.circle_in_view(p[0], p[1], r):
             new_pt = self.pt(p)
-            pygame.draw.circle(win, col, new_pt.val, r*self.params['fact'], width)
+            pygame.draw.circle(win, col, new_pt.val, r*self.fact, width)
 
     def polygon(self, win, col, pts):
         ''' Draw a polygon according to the cameras mode (attributes are same as ```pygame.draw.polygon```)'''
-        if self.mode == 'full':
-            pygame.draw.polygon(win, col, pts)
-        else:
-            new_pts = []
-            for p in pts:
-                new_pts.append(self.pt(P(p)).val)
-            pygame.draw.polygon(win, col, new_pts)
+        pygame.draw.polygon(win, col, self.pts(pts).tolist())
 
     def blit(self, win, path, pt, size):
         '''
@@ -134,10 +145,9 @@ class Camera:
             size (P): size of the sprite
         '''
         x,y = pt
-        size = P(self.params['fact'],self.params['fact'])*P(size)
+        size = P(size)
+        size = P(self.fact*size.x, self.fact*size.y)
 
-        if self.mode == 'full':
-            win.blit(path[self.mode], (P(x,y)-P(0.5,0.5)*size).val)
-        elif self.rect_in_view((x-size.x//2, y-size.y//2, size.x, size.y)):
-                new_pt = self.pt(P(x,y))
-                win.blit(path[self.mode], (new_pt-P(0.5,0.5)*size).val)
+        if self.rect_in_view((x-size.x//2, y-size.y//2, size.x, size.y)):
+            new_pt = self.pt(P(x,y))
+            win.blit(path[self.mode], (new_pt-P(0.5,0.5)*size).val)
@@ -3,7 +3,7 @@ Game specific functions and constants
 
 Includes:
 
-- the actions that a player can take
+- the actions that a player can take (as names and integer codes)
 - possible formations
 - recolor a player sprite
 
@@ -13,6 +13,8 @@ Do not change these constants directly as other parts of the game rely on their
 from pygame import Color
 from point import P
 from settings import *
+from enum import IntEnum
+import numpy as np
 
 ############## Custom types ##############
 
@@ -23,6 +25,64 @@ ACT = {'NOTHING': P(0, 0), None: P(0, 0),
        'SHOOT_D': P(1, 0), 'SHOOT_Z': P(-0.707, 0.707), 'SHOOT_X': P(0, 1), 'SHOOT_C': P(0.707, 0.707)}
 # 0.717 = 1/sqrt(2)
 
+
+class Action(IntEnum):
+    """
+    Integer codes of the actions (used end to end by the teams, agents, ball and AI)
+
+    The codes index the lookup tables below and can be stored directly in NumPy arrays or sent over the network
+    """
+    NOTHING = 0
+    MOVE_U = 1
+    MOVE_D = 2
+    MOVE_L = 3
+    MOVE_R = 4
+    SHOOT_Q = 5
+    SHOOT_W = 6
+    SHOOT_E = 7
+    SHOOT_A = 8
+    SHOOT_D = 9
+    SHOOT_Z = 10
+    SHOOT_X = 11
+    SHOOT_C = 12
+    FORM = 13  # Move towards the formation position (resolved by ```Team.formation_dirs()```, never reaches the game)
+
+
+ACT_DTYPE = np.int8  # dtype of arrays of actions (see ```Team.move_batch()```)
+
+# Lookup tables (indexed by an Action)
+ACT_IS_MOVE = [a.name.startswith('MOVE_') for a in Action]
+ACT_IS_SHOT = [a.name.startswith('SHOOT_') for a in Action]
+ACT_DIR = [ACT.get(a.name, P(0, 0)) for a in Action]  # Direction of the move or shot
+ACT_VEL = [P(PLAYER_SPEED*d.x, PLAYER_SPEED*d.y) if move else P(0, 0)
+           for d, move in zip(ACT_DIR, ACT_IS_MOVE)]  # Displacement of a player per frame
+ACT_DIRS = np.array([(d.x, d.y) for d in ACT_DIR])  # Same as ```ACT_DIR``` for vectorized code
+
+# Accepts the action names (and None) for teams written before the integer codes, as well as the codes themselves
+ACT_CODES = {**{a.name: a for a in Action}, **{a: a for a in Action}, None: Action.NOTHING}
+
+
+def action_code(action):
+    """
+    Convert an action (an ```Action```, its integer value or its name in ```ACT```) to an ```Action```
+    """
+    try:
+        return ACT_CODES[action]
+    except (KeyError, TypeError):
+        raise Exception(f'Unknown action {action}')
+
+
+def action_codes(actions):
+    """
+    Convert a list (or array) of actions (see ```action_code()```) to a list of ```Action```
+    """
+    if isinstance(actions, np.ndarray):
+        actions = actions.tolist()
+    try:
+        return [ACT_CODES[a] for a in actions]
+    except (KeyError, TypeError):
+        return [action_code(a) for a in actions]
+
 """
 Team formations
     - Must start with the keeper
@@ -213,6 +273,47 @@ FORM = {
     },
 }
 
+LINES = ['DEF', 'MID', 'ATK']
+LINE_DEPTH = W//8  # Width of the band covered by each line of a generated formation
+
+
+def form_generate(form, n):
+    """
+    Generate a formation of n players (keeper included) from an 11 player formation (its 'L' side)
+
+    The outfield players are shared between the lines (```LINES```) in the same proportions as in the given formation,
+    the players of a line are laid on a grid centered on the line's average x-coordinate
+    """
+    outfield = form[1:]
+    counts = [sum(pt['pos'] == line for pt in outfield) for line in LINES]
+
+    # Largest remainder split of the n-1 outfield players
+    shares = [(n - 1)*count/len(outfield) for count in counts]
+    sizes = [int(share) for share in shares]
+    for i in sorted(range(len(LINES)), key=lambda i: sizes[i] - shares[i])[:n - 1 - sum(sizes)]:
+        sizes[i] += 1
+
+    generated = [form[0]]
+    for line, count, size in zip(LINES, counts, sizes):
+        if not size:
+            continue
+        x = sum(pt['coord'].x for pt in outfield if pt['pos'] == line)/count
+        rows = min(size, math.ceil(math.sqrt(size*H/LINE_DEPTH)))
+        cols = math.ceil(size/rows)
+        for k in range(size):
+            col, row = divmod(k, rows)
+            in_col = min(rows, size - col*rows)
+            generated.append({
+                'coord': P(x + (col - (cols - 1)/2)*LINE_DEPTH/cols, H*(row + 1)/(in_col + 1)),
+                'pos': line,
+            })
+    return generated
+
+
+if NUM_TEAM != len(FORM['default']['L']):  # Stress mode (see settings.py)
+    for key in FORM.keys():
+        FORM[key]['L'] = form_generate(FORM[key]['L'], NUM_TEAM)
+
 for key in FORM.keys():  # Fill in right side counterparts of all formations
     FORM[key]['R'] = [
         {'coord': P(W, H) - form['coord'], 'pos': form['pos']} for form in FORM[key]['L']]
@@ -0,0 +1,78 @@
+"""
+Per-frame distance cache
+
+The distances between every player and the ball are computed once per frame by ```Game.move_next()```
+(the distances between every pair of players at most once, when first needed) and shared by player selection and the AI:
+
+- Teams read them through ```team.dists```
+- Agents read them through the game's state (```state['dists']```)
+"""
+
+from settings import *
+import numpy as np
+
+
+class Distances:
+    """
+    Distances between the players and the ball at the end of the last frame
+    """
+
+    def __init__(self):
+        """
+        Initializes an empty cache (call ```update()``` before using it)
+
+        Attributes:
+            ball (dict): Distance of each player to the ball (team_id: list indexed like ```team.players```)
+            offset (dict): Index of each team's first player in ```pos``` (team 1's players followed by team 2's)
+            index (dict): Position of each player (by id) in its team (see ```Team.index```)
+        """
+        self.ball = {1: [], 2: []}
+        self.offset = {1: 0, 2: 0}
+        self.index = {1: {}, 2: {}}
+        self.pos = []
+        self._players = None
+
+    def update(self, team1, team2, ball):
+        """
+        Recompute the distances to the ball (the distances between players are computed when first needed)
+
+        Attributes:
+            team1 (Team): Team facing right
+            team2 (Team): Team facing left
+            ball (Ball): The football
+        """
+        bx, by = ball.pos.x, ball.pos.y
+        self.pos = [(player.pos.x, player.pos.y) for player in team1.players + team2.players]
+        to_ball = [math.sqrt((x - bx)**2 + (y - by)**2) for x, y in self.pos]
+
+        n = len(team1.players)
+        self.ball = {1: to_ball[:n], 2: to_ball[n:]}
+        self.offset = {1: 0, 2: n}
+        self.index = {1: team1.index, 2: team2.index}
+        self._players = None
+
+    @property
+    def players(self):
+        """
+        Distance between every pair of players (np.array, rows and columns are ordered like ```pos```)
+        """
+        if self._players is None:
+            pos = np.array(self.pos, dtype=float).reshape(-1, 2)
+            dx = pos[:, 0, None] - pos[:, 0]
+            dy = pos[:, 1, None] - pos[:, 1]
+            self._players = np.sqrt(dx*dx + dy*dy)
+        return self._players
+
+    def to_ball(self, team_id, id):
+        """
+        Distance between the ball and the player (with the given id) of the given team
+        """
+        return self.ball[team_id][self.index[team_id][id]]
+
+    def to_team(self, team_id, id, other_id):
+        """
+        Distances between the player (with the given id) of the given team and every player of the other team (a list)
+        """
+        row = self.players[self.offset[team_id] + self.index[team_id][id]]
+        start = self.offset[other_id]
+        return row[start:start + len(self.ball[other_id])].tolist()
@@ -5,27 +5,24 @@ Manages interactions with the players and the ball
 """
 
 from settings import *
-from const import ACT
+from const import FORM, action_codes
 from ball import Ball
 from stats import Stats
+from heatmap import Heatmap, MODES
+from observation import TeamObservation
 from camera import Camera
-from pygame import mixer
+from audio import audio
+from rollback import GameState
+from distances import Distances
+import numpy as np
 import time
 
 
-mixer.init(44100, -16, 2, 2048)
-applause = mixer.Sound(APPLAUSE)
-kick = mixer.Sound(KICK)
-single_short_whistle = mixer.Sound(SINGLE_SHORT_WHISTLE)
-single_long_whistle = mixer.Sound(SINGLE_LONG_WHISLTE)
-three_whistles = mixer.Sound(THREE_WHISTLES)
-applause = mixer.Sound(APPLAUSE)
-
-
 class Game:
     """ Class that controls the entire game """
 
-    def __init__(self, team1, team2, sound=True, difficulty=0.6, cam='default'):
+    def __init__(self, team1, team2, sound=True, difficulty=0.6, cam='default', match_frames=0, halves=MATCH_HALVES,
+                 dt=1):
         """
         Initializes the game
 
@@ -34,10 +31,17 @@ class Game:
             team2 (Team): Left-facing team
             sound (bool): Enable / Disable in-game sounds
             difficulty (float): Game difficulty (0-1)
+            match_frames (int): Length of the match (in frames), 0 for a match without an end
+            halves (int): Number of halves (the players kick-off again at the start of each one)
+            dt (int): Frames simulated by every call to ```next()``` (e.g. to play headless games faster).
+                The ball can not pass through players whatever the step (see ```Ball.sweep()```), but the teams only
+                decide once per step, so outcomes still drift as dt grows (e.g. fewer goals from corners at dt=4)
         """
         self.sound = sound
         self.difficulty = difficulty
         self.debug = False
+        self.dt = dt
+        self.pairs = {}  # Pairs of players checked by collision() (see collision_pairs())
 
         self.team1 = team1
         self.team1.init(id=1, dir='L', diff=self.difficulty)  # direction is hardcoded, don't change
@@ -46,32 +50,50 @@ class Game:
         self.team2.init(id=2, dir='R', diff=self.difficulty)
 
         self.ball = Ball(pos=(W//2, H//2), sound=sound)
+        self.dists = Distances()  # Shared with both teams, updated every frame
+        self.team1.dists = self.team2.dists = self.dists
+        self.refresh()
         self.stats = Stats()
+        self.heatmap = Heatmap()
+        self.heatmap_mode = 0 # index of the heatmap (in MODES) shown in the pause menu
+        self.record = True  # Add the frames played to the heatmaps (off while re-simulating frames, see ```Rollback```)
 
         self.cam = Camera(self.ball.pos.x, self.ball.pos.y, mode=cam)
+        self.overlay_init()
 
-        self.end = False  # True when the game ends (never probably)
+        self.match_frames = match_frames
+        self.halves = halves
+        self.frame = 0  # Frames played (the match clock)
+        self.full_time = False  # True once the final whistle is blown
+
+        self.end = False  # True when the game ends (at full time or when the player quits)
         self.pause = False
+        self.pause_screen = None  # (key, surface) of the composed pause screen (see ```pause_frame()```)
+        self.turbo = False  # Fast-forward (the driver runs the game uncapped and only draws some frames)
         self.state_prev = None
         # game state to be passed to agents (see get_state() function)
         self.state = None
         self.rewards = None
 
         if self.sound:
-            single_short_whistle.play()
-            applause.play(-1)
+            audio.play('short_whistle')
+            audio.play('applause', loops=-1)
 
-    def check_interruptions(self):
+    def check_interruptions(self, events=None):
         """
         Check for special keyboard buttons
 
         Sets internal flags to pause, quit the game or run it in debug mode
+
+        Attributes:
+            events (list): Events to handle (defaults to the ones waiting in pygame's queue)
         """
-        for event in pygame.event.get():
+        for event in (pygame.event.get() if events is None else events):
             if event.type == pygame.QUIT:  # Quit
-                mixer.pause()
+                audio.pause()
                 if self.sound:
-                    three_whistles.play()
+                    audio.play('three_whistles')
+                    audio.flush()
                 self.end = True
                 pygame.quit()
 
@@ -79,19 +101,27 @@ class Game:
 
                 if event.key == pygame.K_ESCAPE:  # Pause menu
                     self.pause = not self.pause
+                    self.pause_screen = None
                     if self.pause:
-                        mixer.pause()
+                        audio.pause()
                         if self.sound:
-                            single_long_whistle.play()
+                            audio.play('long_whistle')
                     else:
+                        audio.stop()  # sounds paused along with the game are dropped
                         if self.sound:
-                            single_short_whistle.play()
-                            applause.play(-1)
+                            audio.play('short_whistle')
+                            audio.play('applause', loops=-1)
+
+                if event.key == pygame.K_h and self.pause:  # Cycle heatmaps in the pause menu
+                    self.heatmap_mode = (self.heatmap_mode + 1) % len(MODES)
 
                 if event.key == pygame.K_BACKSPACE:  # Return to main menu
-                    mixer.stop()
+                    audio.stop()
                     self.end = True
 
+                if event.key == pygame.K_t:  # Turbo mode
+                    self.turbo = not self.turbo
+
                 if event.key == pygame.K_SPACE:  # Toggle whether to maintain formation
                     self.team1.maintain_formation = not self.team1.maintain_formation
 
@@ -100,71 +130,82 @@ class Game:
                     if mods & pygame.KMOD_CTRL and mods & pygame.KMOD_SHIFT and mods & pygame.KMOD_ALT:
                         self.debug = not self.debug
 
-    def same_team_collision(self, team, free):
-        """
-        Check if current player collides with any other players of the same team
-        """
-        min_dist = P(2*PLAYER_RADIUS, 2*PLAYER_RADIUS)
-        if not free:
-            min_dist.x += BALL_RADIUS
-
-        for player1 in team.players:
-            for player2 in team.players:
-                if player1.id != player2.id and abs(player1.pos.x - player2.pos.x) <= min_dist.x and abs(player1.pos.y - player2.pos.y) <= min_dist.y:
-                    xincr = 1 + PLAYER_RADIUS - \
-                        abs(player1.pos.x-player2.pos.x)//2
-                    xdir = (1, -1)
-                    yincr = 1 + PLAYER_RADIUS - \
-                        abs(player1.pos.y-player2.pos.y)//2
-                    ydir = (1, -1)
-
-                    if player1.pos.x < player2.pos.x:
-                        xdir = (-1, 1)
-                    if player1.pos.y < player2.pos.y:
-                        ydir = (-1, 1)
-
-                    player1.pos.x += xdir[0]*xincr
-                    player2.pos.x += xdir[1]*xincr
-                    player1.pos.y += ydir[0]*yincr
-                    player2.pos.y += ydir[1]*yincr
-
-    def diff_team_collision(self, team1, team2, free):
-        """
-        Check if current player collides with any other players of the opposite team
-        """
-        min_dist = P(2*PLAYER_RADIUS, 2*PLAYER_RADIUS)
-        if not free:
-            min_dist.x += BALL_RADIUS
-
-        for player1 in team1.players:
-            for player2 in team2.players:
-                if abs(player1.pos.x - player2.pos.x) <= min_dist.x and abs(player1.pos.y - player2.pos.y) <= min_dist.y:
-                    if not free:
-                        self.ball.reset(self.ball.pos)
-                    xincr = 1 + 2*PLAYER_RADIUS - \
-                        abs(player1.pos.x-player2.pos.x)//2
-                    xdir = (1, -1)
-                    yincr = 1 + 2*PLAYER_RADIUS - \
-                        abs(player1.pos.y-player2.pos.y)//2
-                    ydir = (1, -1)
-
-                    if player1.pos.x < player2.pos.x:
-                        xdir = (-1, 1)
-                    if player1.pos.y < player2.pos.y:
-                        ydir = (-1, 1)
-
-                    player1.pos.x += xdir[0]*xincr
-                    player2.pos.x += xdir[1]*xincr
-                    player1.pos.y += ydir[0]*yincr
-                    player2.pos.y += ydir[1]*yincr
+    def collision_pairs(self, n1, n2):
+        """
+        Every pair of players for teams of n1 and n2 players (cached, used by ```collision()```)
+
+        Returns (first, second, push, opposite) arrays: the indices of the two players (in ```team1.players + team2.players```),
+        the base push of the pair and whether they play for opposite teams
+        """
+        if (n1, n2) not in self.pairs:
+            first, second = np.triu_indices(n1 + n2, 1)
+            opposite = (first < n1) != (second < n1)
+            push = np.where(opposite, 1 + 2*PLAYER_RADIUS, 1 + PLAYER_RADIUS)
+            self.pairs[(n1, n2)] = (first, second, push, opposite)
+        return self.pairs[(n1, n2)]
+
+    def collision_candidates(self, x, min_x, n1):
+        """
+        Pairs of players that are at most min_x apart along the x-axis (sort and sweep, used by ```collision()```
+        for more than ```COLLISION_SWEEP``` players instead of checking every pair)
+
+        Returns (first, second, push, opposite) arrays like ```collision_pairs()``` (first < second in every pair)
+        """
+        order = np.argsort(x, kind='stable')
+        xs = x[order]
+        start = np.arange(len(x))
+        count = np.searchsorted(xs, xs + min_x, side='right') - start - 1  # Players after each one within min_x
+        a = np.repeat(start, count)
+        b = a + 1 + np.arange(len(a)) - np.repeat(np.cumsum(count) - count, count)
+        a, b = order[a], order[b]
+        first, second = np.minimum(a, b), np.maximum(a, b)
+        opposite = (first < n1) != (second < n1)
+        push = np.where(opposite, 1 + 2*PLAYER_RADIUS, 1 + PLAYER_RADIUS)
+        return first, second, push, opposite
 
     def collision(self, team1, team2, ball):
         """
         Handle collisions between all in-game players.
-        """
-        self.same_team_collision(team1, self.ball.free)
-        self.same_team_collision(team2, self.ball.free)
-        self.diff_team_collision(team1, team2, self.ball.free)
+
+        Every overlapping pair is found at once (on the arrays of positions) and every player is moved by the sum of the
+        pushes of his pairs, so the result does not depend on the order of the players.
+        Players of the same team are pushed just outside of each other, players of opposite teams twice as far
+        (which also frees the ball). This is repeated at most ```COLLISION_ITERS``` times to separate crowds
+        """
+        players = team1.players + team2.players
+        n = len(players)
+        if n < 2:
+            return
+        sweep = n > COLLISION_SWEEP
+        if not sweep:
+            first, second, push, opposite = self.collision_pairs(len(team1.players), len(team2.players))
+        min_x = 2*PLAYER_RADIUS + (0 if ball.free else BALL_RADIUS)
+        min_y = 2*PLAYER_RADIUS
+
+        x = np.array([player.pos.x for player in players], dtype=float)
+        y = np.array([player.pos.y for player in players], dtype=float)
+        moved = np.zeros(n, dtype=bool)
+        for k in range(COLLISION_ITERS):
+            if sweep:
+                first, second, push, opposite = self.collision_candidates(x, min_x, len(team1.players))
+            dx, dy = x[first] - x[second], y[first] - y[second]
+            ax, ay = np.abs(dx), np.abs(dy)
+            hit = np.flatnonzero((ax <= min_x) & (ay <= min_y))  # Overlapping pairs
+            if not len(hit):
+                break
+            if k == 0 and not ball.free and opposite[hit].any():
+                ball.reset(ball.pos)
+
+            # The first player moves away from the second along both axes (forward if they are aligned)
+            i, j, base = first[hit], second[hit], push[hit]
+            px = np.where(dx[hit] < 0, -1, 1)*(base - ax[hit]//2)
+            py = np.where(dy[hit] < 0, -1, 1)*(base - ay[hit]//2)
+            x += np.bincount(i, px, n) - np.bincount(j, px, n)
+            y += np.bincount(i, py, n) - np.bincount(j, py, n)
+            moved[i] = moved[j] = True
+
+        for k in np.flatnonzero(moved).tolist():
+            players[k].pos.x, players[k].pos.y = float(x[k]), float(y[k])
 
     def text_draw(self, win, text, rect, align='center'):
         """
@@ -194,9 +235,9 @@ class Game:
         Display the current score (goals for each side)
         """
         #""" Show game score """
-        goal1_rect = (W//2 - GOAL_DISP_SIZE - 2*LINE_WIDTH,
+        goal1_rect = (SCREEN_W//2 - GOAL_DISP_SIZE - 2*LINE_WIDTH,
                       0, GOAL_DISP_SIZE, GOAL_DISP_SIZE)
-        goal2_rect = (W//2 + 2*LINE_WIDTH, 0, GOAL_DISP_SIZE, GOAL_DISP_SIZE)
+        goal2_rect = (SCREEN_W//2 + 2*LINE_WIDTH, 0, GOAL_DISP_SIZE, GOAL_DISP_SIZE)
         goal_font = pygame.font.Font(FONT_ROBOTO, FONT_SIZE)
 
         pygame.draw.rect(win, (255, 255, 255), goal1_rect)
@@ -206,45 +247,76 @@ class Game:
         text = goal_font.render(str(self.stats.goals[2]), True, (0, 0, 0))
         self.text_draw(win, text, goal2_rect)
 
-    def overlay_draw(self, win):
-        scale_rect = lambda x,y,w,h: (OVER_TOP_LEFT.x + x*OVER_SIZE.x//W, OVER_TOP_LEFT.y + y*OVER_SIZE.y//H, w*OVER_SIZE.x//W, h*OVER_SIZE.y//H)
-        scale_pt = lambda x,y: (OVER_TOP_LEFT.x + x*OVER_SIZE.x//W, OVER_TOP_LEFT.y + y*OVER_SIZE.y//H)
+        if self.match_frames:  # Match clock
+            clock_rect = (SCREEN_W//2 - GOAL_DISP_SIZE - 2*LINE_WIDTH, GOAL_DISP_SIZE,
+                          2*GOAL_DISP_SIZE + 4*LINE_WIDTH, GOAL_DISP_SIZE//2)
+            pygame.draw.rect(win, (42, 42, 42), clock_rect)
+            text = pygame.font.Font(FONT_ROBOTO, FONT_SIZE//2).render(
+                self.clock_text() + (' >>' if self.turbo else ''), True, (255, 255, 255))
+            self.text_draw(win, text, clock_rect)
 
-        r = scale_rect(0,0,W,H)
-        s = pygame.Surface((r[2],r[3]), pygame.SRCALPHA)
-        s.fill((0,0,0,75))
-        win.blit(s, (r[0],r[1]))
-        #pygame.draw.rect(win, (0, 136, 3, 100), r)
-        pygame.draw.rect(win, (255,255,255), r, LINE_WIDTH)
+    def clock_text(self):
+        """
+        Time shown by the match clock (scaled so that the final whistle is at ```MATCH_CLOCK``` minutes)
+        """
+        secs = int(60*MATCH_CLOCK*self.frame/self.match_frames)
+        return f'{secs//60:02d}:{secs%60:02d}'
 
-        pygame.draw.rect(win, (255,255,255),
-            scale_rect(self.cam.c.x - self.cam.params['pt'].x//2, self.cam.c.y - self.cam.params['pt'].y//2,
-            self.cam.params['pt'].x, self.cam.params['pt'].y), LINE_WIDTH)
+    def overlay_init(self):
+        """
+        Build the static layer of the overlay (minimap) i.e. the background, pitch lines and goals
+
+        Also caches the constants used to scale the field to the overlay
+        """
+        self.over_scale = P(OVER_SIZE.x/W, OVER_SIZE.y/H)
+        scale_rect = lambda x,y,w,h: (x*OVER_SIZE.x//W, y*OVER_SIZE.y//H, w*OVER_SIZE.x//W, h*OVER_SIZE.y//H)
 
-        pygame.draw.rect(win, (255, 255, 255), scale_rect(0.95*W-LINE_WIDTH//2,
+        s = pygame.Surface(OVER_SIZE.val, pygame.SRCALPHA)
+        s.fill((0,0,0,75))
+        pygame.draw.rect(s, (255,255,255), (0, 0, OVER_SIZE.x, OVER_SIZE.y), LINE_WIDTH)
+
+        pygame.draw.rect(s, (255, 255, 255), scale_rect(0.95*W-LINE_WIDTH//2,
                                                 GOAL_POS[0]*H, 0.05*W, (GOAL_POS[1]-GOAL_POS[0])*H), LINE_WIDTH)  # right penalty
-        pygame.draw.rect(win, (255, 255, 255), scale_rect(LINE_WIDTH//2,
+        pygame.draw.rect(s, (255, 255, 255), scale_rect(LINE_WIDTH//2,
                                                 GOAL_POS[0]*H, 0.05*W, (GOAL_POS[1]-GOAL_POS[0])*H), LINE_WIDTH)  # left penalty
 
-        pygame.draw.rect(win, self.team2.color,scale_rect(W - 3*LINE_WIDTH,
+        pygame.draw.rect(s, self.team2.color, scale_rect(W - 3*LINE_WIDTH,
                                                  GOAL_POS[0]*H, 3*LINE_WIDTH, (GOAL_POS[1]-GOAL_POS[0])*H))  # right goal
-        pygame.draw.rect(win, self.team1.color,scale_rect(0,
+        pygame.draw.rect(s, self.team1.color, scale_rect(0,
                                                  GOAL_POS[0]*H, 3*LINE_WIDTH, (GOAL_POS[1]-GOAL_POS[0])*H))  # left goal
 
-        pygame.draw.rect(win, (255, 255, 255),
+        pygame.draw.rect(s, (255, 255, 255),
                          scale_rect(W//2 - LINE_WIDTH//2, 0, LINE_WIDTH, H))  # mid line
 
+        self.over_static = s
+        self.over_surf = s.copy()  # static layer + players, ball and camera viewport
+        self.over_count = 0
 
-        for player in self.team1.players:
-            pygame.draw.circle(win, self.team1.color, scale_pt(*player.pos.val),
-                               PLAYER_RADIUS//3)
+    def overlay_draw(self, win):
+        """
+        Draw the overlay (minimap) showing every player, the ball and the camera's view
 
-        for player in self.team2.players:
-            pygame.draw.circle(win, self.team2.color, scale_pt(*player.pos.val),
-                               PLAYER_RADIUS//3)
+        The dynamic layer is only redrawn every ```OVER_REFRESH``` frames, the cached overlay is blitted in between
+        """
+        if self.over_count % OVER_REFRESH == 0:
+            sx, sy = self.over_scale.x, self.over_scale.y
+            s = self.over_surf
+            s.fill((0,0,0,0))
+            s.blit(self.over_static, (0,0), special_flags=pygame.BLEND_RGBA_ADD)  # exact copy of the static layer
 
-            pygame.draw.circle(win, (42,42,42), scale_pt(*(self.ball.pos + PLAYER_CENTER).val),
+            view = self.cam.view
+            pygame.draw.rect(s, (255,255,255), (view[0]*sx, view[1]*sy, view[2]*sx, view[3]*sy), LINE_WIDTH)  # camera
+
+            for team in (self.team1, self.team2):
+                for player in team.players:
+                    pygame.draw.circle(s, team.color, (int(player.pos.x*sx), int(player.pos.y*sy)),
+                                       PLAYER_RADIUS//3)
+
+            pygame.draw.circle(s, (42,42,42), (int(self.ball.pos.x*sx), int(self.ball.pos.y*sy)),
                                BALL_RADIUS)
+        self.over_count += 1
+
+        win.blit(self.over_surf, OVER_TOP_LEFT.val)
 
     def field_draw(self, win, hints):
         """
@@ -293,14 +365,14 @@ class Game:
             text_team1_form = field_font.render(
                 f'Maintain formation: {"ON" if self.team1.maintain_formation else "OFF"}', True, (0, 100, 0))
 
-            self.text_draw(win, text_esc, (W - 2*0.1*W - 3*LINE_WIDTH,
-                                           3*LINE_WIDTH, 2*0.1*W, 0.05*H), align='right')
-            self.text_draw(win, text_space, (W - 3*0.1*W - 3*LINE_WIDTH,
-                                             3*LINE_WIDTH, 2*0.1*W, 0.05*H), align='left')
-            self.text_draw(win, text_back, (W - 0.2*W - 3*LINE_WIDTH,
-                                            3*LINE_WIDTH + 0.05*H, 0.2*W, 0.05*H), align='left')
+            self.text_draw(win, text_esc, (SCREEN_W - 2*0.1*SCREEN_W - 3*LINE_WIDTH,
+                                           3*LINE_WIDTH, 2*0.1*SCREEN_W, 0.05*SCREEN_H), align='right')
+            self.text_draw(win, text_space, (SCREEN_W - 3*0.1*SCREEN_W - 3*LINE_WIDTH,
+                                             3*LINE_WIDTH, 2*0.1*SCREEN_W, 0.05*SCREEN_H), align='left')
+            self.text_draw(win, text_back, (SCREEN_W - 0.2*SCREEN_W - 3*LINE_WIDTH,
+                                            3*LINE_WIDTH + 0.05*SCREEN_H, 0.2*SCREEN_W, 0.05*SCREEN_H), align='left')
             self.text_draw(win, text_team1_form, (3*LINE_WIDTH,
-                                                  3*LINE_WIDTH, 0.2*W, 0.05*H), align='left')
+                                                  3*LINE_WIDTH, 0.2*SCREEN_W, 0.05*SCREEN_H), align='left')
 
             if self.debug:
                 self.cam.circle(win, (0, 200, 100), (0, H//2),
@@ -310,7 +382,7 @@ class Game:
                 text_debug = field_font.render(
                     f'Developer mode: ON', True, (0, 100, 0))
                 self.text_draw(win, text_debug, (3*LINE_WIDTH, 3*LINE_WIDTH +
-                                                 0.05*H, 0.2*W, 0.05*H), align='left')  # Developer model
+                                                 0.05*SCREEN_H, 0.2*SCREEN_W, 0.05*SCREEN_H), align='left')  # Developer model
 
     def draw(self, win, hints=True):
         """
@@ -331,7 +403,7 @@ class Game:
         """
         title_font = pygame.font.Font(FONT_ROBOTO, FONT_SIZE)
         title_text = title_font.render('PRACTICE', True, (0, 100, 0))
-        self.text_draw(win, title_text, (0, 0, W, 0.01*H))
+        self.text_draw(win, title_text, (0, 0, SCREEN_W, 0.01*SCREEN_H))
 
         field_font = pygame.font.Font(FONT_MONO, FONT_SIZE//2)
         text_shoot1 = field_font.render('       Q W E', True, (0, 100, 0))
@@ -340,13 +412,13 @@ class Game:
         text_move = field_font.render(f'Move: Arrow keys', True, (0, 100, 0))
 
         self.text_draw(win, text_move, (3*LINE_WIDTH,
-                                        3*LINE_WIDTH, 0.2*W, 0.05*H))
-        self.text_draw(win, text_shoot1, (3*LINE_WIDTH + 0.2*W, 3 *
-                                          LINE_WIDTH, 2*0.1*W + 2*LINE_WIDTH, 0.05*H), align='left')
-        self.text_draw(win, text_shoot2, (3*LINE_WIDTH + 0.2*W, 3 *
-                                          LINE_WIDTH + 0.05*H, 2*0.1*W + 2*LINE_WIDTH, 0.05*H), align='left')
-        self.text_draw(win, text_shoot3, (3*LINE_WIDTH + 0.2*W, 3*LINE_WIDTH +
-                                          2*0.05*H, 2*0.1*W + 2*LINE_WIDTH, 0.05*H), align='left')
+                                        3*LINE_WIDTH, 0.2*SCREEN_W, 0.05*SCREEN_H))
+        self.text_draw(win, text_shoot1, (3*LINE_WIDTH + 0.2*SCREEN_W, 3 *
+                                          LINE_WIDTH, 2*0.1*SCREEN_W + 2*LINE_WIDTH, 0.05*SCREEN_H), align='left')
+        self.text_draw(win, text_shoot2, (3*LINE_WIDTH + 0.2*SCREEN_W, 3 *
+                                          LINE_WIDTH + 0.05*SCREEN_H, 2*0.1*SCREEN_W + 2*LINE_WIDTH, 0.05*SCREEN_H), align='left')
+        self.text_draw(win, text_shoot3, (3*LINE_WIDTH + 0.2*SCREEN_W, 3*LINE_WIDTH +
+                                          2*0.05*SCREEN_H, 2*0.1*SCREEN_W + 2*LINE_WIDTH, 0.05*SCREEN_H), align='left')
 
     def bar_draw(self, win, dim, w0, h0, w, h, col, val, debug_text, invert=False):
         """
@@ -411,13 +483,14 @@ class Game:
         text_pos = pygame.font.Font(FONT_ROBOTO, FONT_SIZE//2).render(text, True, (255, 255, 255))
         self.text_draw(win, text_pos, (w0, h0, w, h))
 
-    def pause_box_draw(self, win, dim):
+    def pause_box_draw(self, win, dim, title='Pause Menu'):
         """
         Draw the skeleton of the pause menu (bg, title, exit button)
 
         Attributes:
             win: Main window used for all drawing
             dim ([int]): extra dimensions for the pause menu
+            title (str): Title of the menu
         """
 
         W_, H_, W0, H0, pad, min_len = dim
@@ -427,7 +500,7 @@ class Game:
                                              LINE_WIDTH, H_ - LINE_WIDTH))  # border
         # Title
         text_title = pygame.font.Font(FONT_ROBOTO, FONT_SIZE).render(
-            "Pause Menu", True, (255, 255, 255))
+            title, True, (255, 255, 255))
         self.text_draw(win, text_title, (W0 + pad, H0 +
                                          0.05*H_, W_ - pad, 0.04*H_))
 
@@ -437,25 +510,25 @@ class Game:
         text_close2 = pygame.font.Font(
             FONT_ROBOTO, FONT_SIZE//5).render("(ESCAPE)", True, (255, 0, 0))
         self.text_draw(win, text_close1, (W0 + 9*0.1*W_ - pad,
-                                          H0 + 0.03*H_, 0.1*W_, 0.05*H))
+                                          H0 + 0.03*H_, 0.1*W_, 0.05*SCREEN_H))
         self.text_draw(win, text_close2, (W0 + 9*0.1*W_ - pad,
-                                          H0 + 0.08*H_, 0.1*W_, 0.05*H))
+                                          H0 + 0.08*H_, 0.1*W_, 0.05*SCREEN_H))
 
-    def pause_draw(self, win):
+    def pause_draw(self, win, title='Pause Menu'):
         """
-        Draw the pause menu
+        Draw the pause menu (also shown at full time)
 
         Displays statistics for possession, pass accuracy and shot accuracy
         """
-        W_, H_ = int(0.8*W), int(0.8*H)
-        W0, H0 = int(0.1*W), int(0.1*H)
+        W_, H_ = int(0.8*SCREEN_W), int(0.8*SCREEN_H)
+        W0, H0 = int(0.1*SCREEN_W), int(0.1*SCREEN_H)
 
         pad = W_*0.02
         min_len = W_*0.01
 
         dim = [W_, H_, W0, H0, pad, min_len] # extra dimensions for the pause menu
 
-        self.pause_box_draw(win, dim)
+        self.pause_box_draw(win, dim, title)
 
         # Possession
         pos = self.stats.get_possession()
@@ -508,6 +581,35 @@ class Game:
             col=self.team2.color, val=sa[1], invert=True,
             debug_text=f'{int(round(100*sa[1],0))} ({self.stats.shot_acc[2]["succ"]}/{self.stats.shot_acc[2]["succ"]+self.stats.shot_acc[2]["fail"]})')
 
+        # Heatmaps
+        mode = MODES[self.heatmap_mode]
+        hp = self.heatmap.get_possession()
+
+        self.bar_label_draw(win, dim,
+            W0, H0 + 0.72*H_, W_, 0.06*H_,
+            f"{mode.upper()} HEATMAP (H) - TIME IN POSSESSION {round(100*hp[0])}% / {round(100*hp[1])}%")
+
+        heat_h = 0.18*H_
+        heat_w = heat_h*W/H
+        self.heatmap.draw(win, (W0 + W_/4 - heat_w/2, H0 + 0.79*H_, heat_w, heat_h),
+            mode, 1, self.team1.color) # team 1
+        self.heatmap.draw(win, (W0 + 3*W_/4 - heat_w/2, H0 + 0.79*H_, heat_w, heat_h),
+            mode, 2, self.team2.color) # team 2
+
+    def pause_frame(self, win):
+        """
+        Draw the frozen game with the pause menu on top
+
+        The screen is composed once and then re-blitted (it is only composed again when what it shows changes)
+        """
+        key = (self.heatmap_mode, self.debug, self.team1.maintain_formation, win.get_size())
+        if self.pause_screen is None or self.pause_screen[0] != key:
+            self.draw(win)
+            self.pause_draw(win)
+            self.pause_screen = (key, win.copy())
+        else:
+            win.blit(self.pause_screen[1], (0, 0))
+
     def get_state(self):
         """
         Create a state object that summarizes the entire game
@@ -523,6 +625,7 @@ class Game:
                 'goal_x' # The x-coordinate of their goal post
             },
             'ball' # Position of the ball
+            'dists' # Distances between the players and the ball (see distances.py)
         }
         ```
         """
@@ -538,16 +641,87 @@ class Game:
                 'goal_x': self.team2.goal_x,
             },
             'ball': self.ball,
+            'dists': self.dists,
         }
 
+    def save_state(self, buf=None):
+        """
+        Copy the game's state into a (preallocated) buffer
+
+        Attributes:
+            buf (GameState): buffer to reuse (a new one is allocated if not given)
+
+        Returns the buffer, pass it to ```load_state()``` to restore the game
+        """
+        if buf is None:
+            buf = GameState(self)
+        return buf.save(self)
+
+    def load_state(self, buf):
+        """
+        Restore the game to a state saved using ```save_state()```
+        """
+        buf.load(self)
+        self.state_prev, self.state = self.get_state(), self.get_state()
+
+    def refresh(self):
+        """
+        Recompute everything derived from the positions of the players and the ball
+
+        i.e. the distance cache and the targets of each team's formation
+        """
+        self.dists.update(self.team1, self.team2, self.ball)
+        self.team1.shift_formation(self.ball.pos)
+        self.team2.shift_formation(self.ball.pos)
+
+    def half(self):
+        """
+        The current half (starting from 1)
+        """
+        if not self.match_frames:
+            return 1
+        return min(self.frame*self.halves//self.match_frames + 1, self.halves)
+
+    def kickoff(self):
+        """
+        Put every player back at his formation position and the ball at the center (e.g. at half-time)
+        """
+        for team in (self.team1, self.team2):
+            for player in team.players:
+                player.pos = P(FORM[team.formation][team.dir][player.id]['coord'])
+                player.walk_count = 0
+            if hasattr(team, 'reset_schedule'):
+                team.reset_schedule()
+        self.ball.reset((W//2, H//2))
+        self.refresh()
+
+    def clock_update(self):
+        """
+        Run the match clock for 1 frame: kick-off at the start of every half and final whistle at the end
+        """
+        if not self.match_frames or self.full_time:
+            return
+        half = self.half()
+        self.frame += self.dt
+        if self.frame >= self.match_frames:
+            self.full_time = True
+            self.end = True
+            if self.sound:
+                audio.stop()
+                audio.play('three_whistles')
+        elif self.half() != half:
+            self.kickoff()
+            if self.sound:
+                audio.play('long_whistle')
+
     def next(self):
         """
-        Move the game forward by 1 frame
+        Move the game forward by ```dt``` frames (1 by default)
 
-        Passes state objects to the teams and pass their actions to ```move_next()```
+        Passes an observation to each team (see ```Team.move_batch()```) and their actions to ```move_next()```
         """
-        a1 = self.team1.move(self.state_prev, self.state, self.rewards)
-        a2 = self.team2.move(self.state_prev, self.state, self.rewards)
+        a1 = self.team1.move_batch(TeamObservation(self, 1))
+        a2 = self.team2.move_batch(TeamObservation(self, 2))
         self.state_prev, self.state, self.rewards = self.move_next(a1, a2)
 
     def move_next(self, a1, a2):
@@ -555,23 +729,28 @@ class Game:
         Update the players' and ball's internal state based on the teams' actions
 
         Attributes:
-            a1 (list): list of actions (1 for each player) in team 1
-            a2 (list): list of actions (1 for each player) in team 2
+            a1 (list): list (or array) of actions (1 for each player) in team 1
+            a2 (list): list (or array) of actions (1 for each player) in team 2
 
-        Each action must be a key in the ```ACT``` dictionary found in ```const.py```
+        Each action must be an ```Action``` (or its name, a key in the ```ACT``` dictionary) found in ```const.py```
         """
+        a1, a2 = action_codes(a1), action_codes(a2)
 
         state_prev = self.get_state()
 
-        self.team1.update(a1, self.ball)  # Update team's state
-        self.team2.update(a2, self.ball)
+        self.team1.update(a1, self.ball, self.dt)  # Update team's state
+        self.team2.update(a2, self.ball, self.dt)
 
         # Check for collision between players
         self.collision(self.team1, self.team2, self.ball)
 
         self.ball.update(self.team1, self.team2, a1, a2,
-                         self.stats)  # Update ball's state
+                         self.stats, self.dt)  # Update ball's state
+        self.refresh()
+        if self.record:
+            self.heatmap.update(self.team1, self.team2, self.ball)
 
+        self.clock_update()
         self.cam.move(self.ball.pos.x, self.ball.pos.y)
 
         state = self.get_state()
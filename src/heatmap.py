@@ -0,0 +1,181 @@
+"""
+Positional heatmaps
+
+Accumulates (on a coarse grid laid over the pitch):
+
+- Occupancy of each team
+- Coverage of each player
+- Position of the ball while each team is in possession
+
+Updated once per frame, rendered (incrementally) in the pause menu and exportable as JSON
+"""
+
+from settings import *
+import json
+
+MODES = ['occupancy', 'possession']  # Heatmaps that can be displayed in the pause menu
+
+
+class Heatmap:
+    """
+    Grid-based accumulator of player and ball positions
+    """
+
+    def __init__(self, grid=HEATMAP_GRID):
+        """
+        Initializes the (empty) heatmaps
+
+        Attributes:
+            grid (P): Number of cells along the x and y axis
+        """
+        self.grid = P(grid)
+        self.scale = P(self.grid.x/W, self.grid.y/H)
+        zeros = lambda: [[0]*self.grid.x for _ in range(self.grid.y)]
+
+        # Grids are nested lists (indexed by [row][column]), plain ints are much cheaper to update than numpy scalars
+        # Teams are indexed by their id (like Stats)
+        self.occupancy = {1: zeros(), 2: zeros()}
+        self.coverage = {1: [zeros() for _ in range(NUM_TEAM)], 2: [zeros() for _ in range(NUM_TEAM)]}
+        self.possession = {1: zeros(), 2: zeros()}
+        self.possession_frames = { 1: 0, 2: 0 }
+        self.frames = 0
+
+        # Rendering cache - only the cells that changed since the last draw are redrawn
+        self.max = {(mode, team_id): 0 for mode in MODES for team_id in (1, 2)}
+        self.dirty = {(mode, team_id): set() for mode in MODES for team_id in (1, 2)}
+        self.cache = {}
+
+    def cell(self, pos):
+        """
+        Return the (row, column) of the cell containing the given position
+        """
+        gx = min(max(int(pos.x*self.scale.x), 0), self.grid.x - 1)
+        gy = min(max(int(pos.y*self.scale.y), 0), self.grid.y - 1)
+        return gy, gx
+
+    def add(self, mode, team_id, grid, gy, gx):
+        """
+        Increment a cell of a team's grid and mark it for redrawing
+        """
+        row = grid[team_id][gy]
+        row[gx] += 1
+        key = (mode, team_id)
+        if row[gx] > self.max[key]:
+            self.max[key] = row[gx]
+        self.dirty[key].add((gy, gx))
+
+    def update(self, team1, team2, ball):
+        """
+        Add the current frame to the heatmaps
+
+        Attributes:
+            team1 (Team): Team facing right
+            team2 (Team): Team facing left
+            ball (Ball): The football
+        """
+        self.frames += 1
+        for team in (team1, team2):
+            coverage = self.coverage[team.id]
+            for player in team.players:
+                gy, gx = self.cell(player.pos)
+                coverage[player.id][gy][gx] += 1
+                self.add('occupancy', team.id, self.occupancy, gy, gx)
+
+        team_id = ball.ball_stats['team']
+        if team_id in self.possession_frames:
+            self.possession_frames[team_id] += 1
+            gy, gx = self.cell(ball.pos)
+            self.add('possession', team_id, self.possession, gy, gx)
+
+    def get_possession(self):
+        """
+        Return a tuple containing the fraction of time (between 0 and 1) each team spent in possession
+
+        It is rounded to 2 decimal places and their sum is guaranteed to be 1
+        """
+        total = self.possession_frames[1] + self.possession_frames[2]
+        if total == 0:
+            team1_pos = 0.5
+        else:
+            team1_pos = round(self.possession_frames[1]/total, 2)
+        return team1_pos, 1-team1_pos
+
+    def color(self, val, max_val, col):
+        """
+        Color of a cell (team color with opacity proportional to the cell's count)
+        """
+        alpha = 0 if max_val == 0 else int(220*math.sqrt(min(val/max_val, 1)))
+        return (col[0], col[1], col[2], alpha)
+
+    def render(self, mode, team_id, col):
+        """
+        Return the (unscaled) surface for the given heatmap, redrawing only the cells that changed
+
+        The whole surface is rebuilt if the team's color changes or the maximum count has
+        grown enough that the existing cells would be noticeably off
+        """
+        key = (mode, team_id)
+        grid = self.occupancy if mode == 'occupancy' else self.possession
+        entry = self.cache.get(key)
+
+        if entry is None or entry['color'] != col or self.max[key] > 1.5*entry['max']:
+            surf = pygame.Surface(self.grid.val, pygame.SRCALPHA)
+            entry = {'surf': surf, 'scaled': None, 'color': col, 'max': max(self.max[key], 1)}
+            for gy in range(self.grid.y):
+                for gx in range(self.grid.x):
+                    surf.set_at((gx, gy), self.color(grid[team_id][gy][gx], entry['max'], col))
+            self.cache[key] = entry
+            self.dirty[key].clear()
+
+        elif self.dirty[key]:
+            for gy, gx in self.dirty[key]:
+                entry['surf'].set_at((gx, gy), self.color(grid[team_id][gy][gx], entry['max'], col))
+            entry['scaled'] = None
+            self.dirty[key].clear()
+
+        return entry
+
+    def draw(self, win, rect, mode, team_id, col):
+        """
+        Draw a heatmap on top of a miniature pitch
+
+        Attributes:
+            win (pygame.display): window for rendering
+            rect (tuple): Rectangle specified as (x, y, width, height)
+            mode (str): One of ```MODES```
+            team_id (int): The team whose heatmap is drawn
+            col (tuple): The team's RGB color
+        """
+        x, y, w, h = [int(v) for v in rect]
+        entry = self.render(mode, team_id, col)
+        if entry['scaled'] is None or entry['scaled'].get_size() != (w, h):
+            entry['scaled'] = pygame.transform.scale(entry['surf'], (w, h))
+
+        pygame.draw.rect(win, (14, 156, 23), (x, y, w, h))  # green ground
+        pygame.draw.rect(win, (255, 255, 255), (x + w//2 - LINE_WIDTH//2, y, LINE_WIDTH, h))  # mid line
+        win.blit(entry['scaled'], (x, y))
+        pygame.draw.rect(win, (255, 255, 255), (x, y, w, h), LINE_WIDTH)  # border
+
+    def to_dict(self):
+        """
+        Summarize the heatmaps as a (JSON serializable) dictionary
+        """
+        return {
+            'grid': self.grid.val,
+            'field': (W, H),
+            'frames': self.frames,
+            'possession_frames': self.possession_frames,
+            'occupancy': self.occupancy,
+            'coverage': self.coverage,
+            'possession': self.possession,
+        }
+
+    def export(self, path):
+        """
+        Write the heatmaps to a JSON file (used for tournament analysis)
+
+        Attributes:
+            path (str): Path of the output file
+        """
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f)
@@ -0,0 +1,87 @@
+"""
+Localhost check of the network code (the server and both clients run on this machine)
+
+```python3 loopback.py```
+
+Starts a ```GameServer``` on 127.0.0.1 whose teams are both ```RemoteTeam```s, connects a ```GameClient``` to each team
+and plays a few ticks while every client keeps sending an action. It then checks that:
+
+- Each client joined the team it asked for
+- Inputs round-trip: the server applied each client's action to its team and acknowledged it (the client knows its rtt)
+- Snapshots round-trip: the state rebuilt by each client from keyframes and deltas equals the server's last snapshot
+
+An exception is raised if any check fails
+"""
+
+import os
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+from settings import *
+from const import Action
+from network import GameServer, GameClient, RemoteTeam, snapshot_entries
+import asyncio
+import time
+
+ACTIONS = {1: Action.MOVE_U, 2: Action.MOVE_D}  # Action sent by the client of each team
+
+
+async def check(ticks, tick_rate, timeout=5):
+    """
+    Run the server and the 2 clients for the given number of ticks and check what they exchanged
+
+    Returns a dictionary of statistics (per team: bytes received by the client and its round trip time)
+    """
+    server = GameServer(RemoteTeam(), RemoteTeam(), tick_rate=tick_rate)
+    port = await server.start('127.0.0.1', 0)  # any free port
+    loop = asyncio.get_running_loop()
+    clients = {team_id: GameClient('127.0.0.1', port, team_id=team_id) for team_id in ACTIONS}
+    try:
+        for client in clients.values():
+            await loop.run_in_executor(None, client.start)  # blocks until the client has joined
+
+        for team_id, client in clients.items():
+            if client.team_id != team_id:
+                raise Exception(f'Client of team {team_id} joined team {client.team_id}')
+
+        task = asyncio.ensure_future(server.run(ticks))
+        while not task.done():
+            for team_id, client in clients.items():
+                client.send(int(ACTIONS[team_id]))
+            await asyncio.sleep(1/tick_rate)
+        await task
+
+        # Wait for the clients to receive the last snapshot
+        deadline = time.time() + timeout
+        while any(not client.history or client.history[-1][0] != server.tick for client in clients.values()):
+            if time.time() > deadline:
+                raise Exception(f'Clients did not receive tick {server.tick} within {timeout}s')
+            await asyncio.sleep(0.01)
+
+        entries = snapshot_entries(server.game)
+        for team_id, client in clients.items():
+            if server.teams[team_id].action != ACTIONS[team_id]:
+                raise Exception(f'Team {team_id} plays {server.teams[team_id].action!r}, '
+                                f'its client sent {ACTIONS[team_id]!r}')
+            if client.rtt is None:
+                raise Exception(f'The actions of team {team_id} were never acknowledged')
+            with client.lock:
+                received = dict(client.entries)
+            if received != entries:
+                diff = sorted(k for k in entries if received.get(k) != entries[k])
+                raise Exception(f'Client of team {team_id} rebuilt a different state (entries {diff})')
+
+        return {team_id: {'bytes': client.bytes, 'rtt': client.rtt} for team_id, client in clients.items()}
+    finally:
+        for client in clients.values():
+            client.close()
+        await server.close()
+
+
+if __name__ == '__main__':
+    from args import get_loopback_args
+    args = get_loopback_args()
+    stats = asyncio.run(check(args.ticks, args.tick_rate))
+    for team_id, s in stats.items():
+        print(f'Team {team_id}: received {s["bytes"]} bytes in {args.ticks} ticks, rtt {1000*s["rtt"]:.1f} ms')
+    print('Snapshots and inputs round-tripped')
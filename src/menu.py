@@ -2,11 +2,11 @@
 Defines the game menu (written using pygame-menu)
 """
 
-from pygame import mixer
 import pygame_menu
 from settings import *
 from const import FORM
 from game import Game
+from audio import audio
 
 MAX_CHAR = 50
 V_PAD = 20
@@ -15,8 +15,6 @@ V_PAD = 20
 # Init sound
 engine = pygame_menu.sound.Sound()
 engine.set_sound(pygame_menu.sound.SOUND_TYPE_CLICK_MOUSE, CLICK)
-mixer.init(44100, -16, 2, 2048)
-menu_music = mixer.Sound(MENU_MUSIC)
 
 # Theme
 menu_bg = pygame_menu.baseimage.BaseImage(  # load background image
@@ -56,7 +54,7 @@ class Menu:
         self.cam = cam
 
     def create_about_menu(self):
-        about_menu = pygame_menu.Menu(H, W, ' About',
+        about_menu = pygame_menu.Menu(SCREEN_H, SCREEN_W, ' About',
                                       theme=custom_theme,
                                       mouse_motion_selection=True,
                                       mouse_visible=True)
@@ -71,7 +69,7 @@ class Menu:
         return about_menu
 
     def create_instr_menu(self):
-        instr_menu = pygame_menu.Menu(H, W, ' Instructions',
+        instr_menu = pygame_menu.Menu(SCREEN_H, SCREEN_W, ' Instructions',
                                       theme=custom_theme,
                                       mouse_motion_selection=True,
                                       mouse_visible=True,
@@ -122,11 +120,14 @@ class Menu:
         instr_menu.add_label('BACKSPACE        Exit to main menu',
                              align=pygame_menu.locals.ALIGN_LEFT)
         instr_menu.add_vertical_margin(V_PAD)
+        instr_menu.add_label('T                         Toggle turbo mode (fast-forward)',
+                             align=pygame_menu.locals.ALIGN_LEFT)
+        instr_menu.add_vertical_margin(V_PAD)
         instr_menu.add_button('Back', pygame_menu.events.BACK)
         return instr_menu
 
     def create_sett_menu(self):
-        sett_menu = pygame_menu.Menu(H, W, ' Settings',
+        sett_menu = pygame_menu.Menu(SCREEN_H, SCREEN_W, ' Settings',
                                      theme=custom_theme,
                                      mouse_motion_selection=True,
                                      mouse_visible=True)
@@ -180,7 +181,7 @@ class Menu:
         # Temporarily set the background to be transparent
         custom_theme.background_color = (42, 42, 42, 0)
 
-        form_menu = pygame_menu.Menu(H, W, 'Formation',
+        form_menu = pygame_menu.Menu(SCREEN_H, SCREEN_W, 'Formation',
                                      theme=custom_theme,
                                      mouse_motion_selection=True,
                                      mouse_visible=True)
@@ -207,14 +208,14 @@ class Menu:
         return form_menu
 
     def create_pract_menu(self):
-        practice_menu = pygame_menu.Menu(H, W, 'Formation',
+        practice_menu = pygame_menu.Menu(SCREEN_H, SCREEN_W, 'Formation',
                                          theme=custom_theme,
                                          mouse_motion_selection=True,
                                          mouse_visible=True)
         return practice_menu
 
     def create_main_menu(self, play, practice):
-        main_menu = pygame_menu.Menu(H, W, ' FIFA 42',
+        main_menu = pygame_menu.Menu(SCREEN_H, SCREEN_W, ' FIFA 42',
                                      theme=custom_theme,
                                      mouse_motion_selection=True,
                                      mouse_visible=True)
@@ -245,9 +246,9 @@ class Menu:
 
     def set_menu_sound(self, name, val):
         if self.sound and not val:
-            mixer.pause()
+            audio.pause()
         elif not self.sound and val:
-            mixer.unpause()
+            audio.resume()
         self.sound = val
 
     def draw_bg(self):
@@ -260,8 +261,9 @@ class Menu:
         Display the game menu
         """
         if self.sound:
-            mixer.stop()
-            menu_music.play(-1)
+            audio.stop()
+            audio.play('menu', loops=-1)
+            audio.flush()
         self.main_menu.mainloop(self.win, bgfun=self.draw_bg)  # Show the menu
 
 def play_with_menu(win, team1, team2, play, practice, sound, difficulty, cam):
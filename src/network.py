@@ -0,0 +1,429 @@
+"""
+Local network multiplayer
+
+- ```GameServer``` runs the authoritative game at a fixed tick rate and accepts actions for either team
+- ```GameClient``` sends the local player's actions and receives (delta compressed) snapshots
+- ```RemoteTeam``` is a team whose selected player is controlled over the network
+- ```BroadcastServer``` streams a match to many spectators
+
+Messages are newline-delimited JSON sent over TCP (asyncio streams)
+
+Snapshots are lists of entries (see ```snapshot_entries()```). A keyframe contains every entry,
+other snapshots only contain the entries that changed since the previous snapshot sent to that client
+"""
+
+from settings import *
+from const import Action, ACT_CODES
+from game import Game
+from teams.human import HumanTeam
+import asyncio
+import threading
+import json
+import time
+
+
+class RemoteTeam(HumanTeam):
+    """
+    A human team whose selected player is controlled by a remote client
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.action = Action.NOTHING # last action received from the client
+
+    def move(self, state_prev, state, reward):
+        """
+        Same as the ```HumanTeam``` except that the selected player uses the last action received
+        """
+        actions = []
+        for i, player in enumerate(self.players):
+            if i == self.selected:
+                actions.append(self.action)
+            elif self.maintain_formation:
+                actions.append(self.formation_dir(i))
+            else:
+                actions.append(Action.NOTHING)
+        return actions
+
+
+def snapshot_entries(game):
+    """
+    Summarize the game as a dictionary of entries (key: value)
+
+    ```
+    'b': [x, y]                             # ball
+    'g': [goals1, goals2]                   # score
+    '<team_id>.<id>': [x, y, dir, count]    # player
+    ```
+    """
+    entries = {
+        'b': [round(game.ball.pos.x, 1), round(game.ball.pos.y, 1)],
+        'g': [game.stats.goals[1], game.stats.goals[2]],
+    }
+    for team in (game.team1, game.team2):
+        for player in team.players:
+            entries[f'{team.id}.{player.id}'] = [round(player.pos.x, 1), round(player.pos.y, 1),
+                                                player.walk_dir, player.walk_count]
+    return entries
+
+
+def snapshot_delta(entries, base):
+    """
+    Return the entries that differ from the base (all entries if there is no base)
+    """
+    if base is None:
+        return dict(entries)
+    return {k: v for k, v in entries.items() if base.get(k) != v}
+
+
+def apply_snapshot(game, entries, ball_pos=None):
+    """
+    Write the (full) snapshot entries into a game so that it can be drawn
+
+    Attributes:
+        game (Game): The game to overwrite (its teams need not match the server's)
+        entries (dict): Snapshot entries
+        ball_pos (P): Position to use instead of the snapshot's ball (e.g. when interpolating)
+    """
+    teams = {1: game.team1, 2: game.team2}
+    for k, v in entries.items():
+        if k == 'b':
+            game.ball.pos = P(ball_pos) if ball_pos is not None else P(v[0], v[1])
+        elif k == 'g':
+            game.stats.goals[1], game.stats.goals[2] = v
+        else:
+            team_id, id = k.split('.')
+            players = teams[int(team_id)].players
+            id = int(id)
+            if id < len(players):
+                players[id].pos = P(v[0], v[1])
+                players[id].walk_dir = v[2]
+                players[id].walk_count = v[3]
+    game.cam.move(game.ball.pos.x, game.ball.pos.y)
+
+
+class GameServer:
+    """
+    Server that runs the authoritative game and sends snapshots to its clients
+    """
+
+    def __init__(self, team1, team2, difficulty=0.6, tick_rate=NET_TICK_RATE, keyframe=NET_KEYFRAME):
+        """
+        Initializes the server
+
+        Attributes:
+            team1 (Team): Team 1 (use a ```RemoteTeam``` to let a client control it)
+            team2 (Team): Team 2 (use a ```RemoteTeam``` to let a client control it)
+            difficulty (float): Game difficulty (0-1)
+            tick_rate (int): Number of game frames simulated per second
+            keyframe (int): Send a full snapshot every these many ticks
+        """
+        self.game = Game(team1, team2, sound=False, difficulty=difficulty, cam='full')
+        self.teams = {1: team1, 2: team2}
+        self.tick_rate = tick_rate
+        self.keyframe = keyframe
+        self.tick = 0
+        self.clients = {}
+        self.tasks = set() # one task per connected client
+        self.num_clients = 0
+        self.running = False
+        self.server = None
+        self.start_time = None
+
+    async def start(self, host='127.0.0.1', port=NET_PORT):
+        """
+        Start listening for clients. Returns the port the server is bound to
+        """
+        self.server = await asyncio.start_server(self.handle_client, host, port)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def handle_client(self, reader, writer):
+        """
+        Handle a single client
+
+        The first message must be ```{"join": team_id}``` (team_id is 0 for spectators),
+        every later message is an action ```{"a": action, "ts": client_time}``` (an ```Action``` code, names are also accepted)
+
+        A client asking for a team that is not played remotely becomes a spectator.
+        Malformed join messages and teams that already have a client are refused (```{"error": reason}```)
+        """
+        self.num_clients += 1
+        client = {'id': self.num_clients, 'team': 0, 'base': None, 'bytes': 0, 'ack': None, 'joined': time.time()}
+        task = asyncio.current_task()
+        self.tasks.add(task)
+        try:
+            msg = json.loads(await reader.readline())
+            join = msg.get('join') if isinstance(msg, dict) else None
+            if not isinstance(join, int) or isinstance(join, bool):
+                error = f'Invalid join message {msg!r}'
+            elif join and any(c['team'] == join for c in self.clients.values()):
+                error = f'Team {join} already has a client'
+            else:
+                error = None
+            if error is not None:
+                writer.write((json.dumps({'error': error}) + '\n').encode())
+                return
+
+            client['team'] = join if isinstance(self.teams.get(join), RemoteTeam) else 0
+            self.clients[writer] = client
+            writer.write((json.dumps({'team': client['team'], 'rate': self.tick_rate}) + '\n').encode())
+
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                msg = json.loads(line)
+                action = msg.get('a')
+                if client['team'] and isinstance(action, (int, str)) and action in ACT_CODES:
+                    self.teams[client['team']].action = ACT_CODES[action]
+                    client['ack'] = msg.get('ts')
+        except (ConnectionError, ValueError):
+            pass
+        finally:
+            if client['team']:
+                self.teams[client['team']].action = Action.NOTHING
+            self.clients.pop(writer, None)
+            self.tasks.discard(task)
+            writer.close()
+
+    def step(self):
+        """
+        Simulate one tick and send every client its snapshot
+
+        Clients whose write buffer exceeds ```NET_MAX_BUFFER``` are skipped, they get a keyframe once it drains
+        """
+        self.game.next()
+        self.tick += 1
+
+        entries = snapshot_entries(self.game)
+        for writer, client in list(self.clients.items()):
+            if writer.transport.get_write_buffer_size() > NET_MAX_BUFFER:
+                client['base'] = None # client is too slow, drop snapshots until it catches up (then send a keyframe)
+                continue
+            keyframe = client['base'] is None or self.tick % self.keyframe == 0
+            delta = snapshot_delta(entries, None if keyframe else client['base'])
+            msg = (json.dumps({'t': self.tick, 'k': int(keyframe), 'ack': client['ack'], 'e': delta},
+                              separators=(',', ':')) + '\n').encode()
+            writer.write(msg)
+            client['bytes'] += len(msg)
+            client['base'] = entries
+
+    async def run(self, ticks=None):
+        """
+        Run the tick loop (forever or for the given number of ticks)
+
+        Ticks are scheduled against the loop's clock, so a late tick does not shift the ones after it.
+        The server never waits for its clients, snapshots are skipped for those that lag (see ```step()```)
+        """
+        loop = asyncio.get_running_loop()
+        self.running = True
+        self.start_time = loop.time()
+        next_tick = self.start_time
+        while self.running and (ticks is None or self.tick < ticks):
+            self.step()
+            next_tick += 1/self.tick_rate
+            await asyncio.sleep(max(0, next_tick - loop.time()))
+        self.running = False
+
+    def bandwidth(self):
+        """
+        Return the average number of bytes sent per second to each client (indexed by the client's id)
+        """
+        now = time.time()
+        return {c['id']: c['bytes']/max(now - c['joined'], 1e-6) for c in self.clients.values()}
+
+    async def close(self):
+        """
+        Stop the tick loop and disconnect all clients
+        """
+        self.running = False
+        self.server.close()
+        for writer in list(self.clients):
+            writer.close()  # client tasks see the end of their stream and exit
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        await self.server.wait_closed()
+
+
+class BroadcastServer(GameServer):
+    """
+    Server that streams a match (usually AI vs AI) to many spectators
+
+    Each tick is encoded once and the same bytes are sent to every viewer, so the cost per viewer stays constant:
+
+    - Keyframes (every ```keyframe``` ticks) contain the full state
+    - Other snapshots only contain the players and ball that changed since the last keyframe
+    - Viewers whose write buffer exceeds ```NET_MAX_BUFFER``` are skipped until it drains,
+    they then receive the last keyframe and continue from there
+    """
+
+    def __init__(self, team1, team2, difficulty=0.6, tick_rate=NET_TICK_RATE, keyframe=NET_KEYFRAME):
+        super().__init__(team1, team2, difficulty, tick_rate, keyframe)
+        self.teams = {} # spectators can not control any team
+        self.key_entries = None
+        self.key_msg = None
+
+    def encode(self, keyframe, entries):
+        return (json.dumps({'t': self.tick, 'k': int(keyframe), 'rel': 'key', 'ack': None, 'e': entries},
+                           separators=(',', ':')) + '\n').encode()
+
+    def step(self):
+        """
+        Simulate one tick and publish its snapshot to every viewer
+        """
+        self.game.next()
+        self.tick += 1
+
+        entries = snapshot_entries(self.game)
+        keyframe = self.key_entries is None or self.tick % self.keyframe == 0
+        if keyframe:
+            self.key_entries = entries
+            self.key_msg = msg = self.encode(True, entries)
+        else:
+            msg = self.encode(False, snapshot_delta(entries, self.key_entries))
+
+        for writer, client in list(self.clients.items()):
+            if writer.transport.get_write_buffer_size() > NET_MAX_BUFFER:
+                client['base'] = None # viewer is too slow, drop snapshots until it catches up
+                continue
+            if client['base'] is None and not keyframe:
+                writer.write(self.key_msg)
+                client['bytes'] += len(self.key_msg)
+            writer.write(msg)
+            client['bytes'] += len(msg)
+            client['base'] = self.key_entries
+
+
+class GameClient:
+    """
+    Client that controls a team on a remote server
+
+    Networking runs on a background thread, the game loop only calls
+    ```send()``` and ```interpolate()```
+    """
+
+    def __init__(self, host='127.0.0.1', port=NET_PORT, team_id=1, interp=NET_INTERP_TICKS):
+        """
+        Initializes the client (call ```start()``` to connect)
+
+        Attributes:
+            host (str): Server's address
+            port (int): Server's port
+            team_id (int): Team to control (0 to only watch the game)
+            interp (int): Render this many ticks behind the latest snapshot
+        """
+        self.host = host
+        self.port = port
+        self.team_id = team_id
+        self.interp = interp
+
+        self.entries = {} # current (full) state, deltas are applied on top of it
+        self.key_entries = {} # last keyframe (base of the broadcast server's deltas)
+        self.history = [] # last few (tick, receive time, ball position, entries)
+        self.lock = threading.Lock()
+        self.rate = NET_TICK_RATE
+        self.rtt = None # round trip time (s) of the last acknowledged action
+        self.bytes = 0
+        self.connected = threading.Event() # set once joined (or failed to)
+        self.closed = threading.Event() # set once the connection ended
+        self.error = None # exception that ended the connection (if any)
+        self.loop = None
+        self.writer = None
+
+    def start(self, timeout=NET_CONNECT_TIMEOUT):
+        """
+        Connect to the server on a background thread (blocks until connected)
+
+        Raises the error that prevented joining (or an exception if the server did not answer within ```timeout``` s)
+        """
+        self.loop = asyncio.new_event_loop()
+        threading.Thread(target=self.loop.run_until_complete, args=(self.run(),), daemon=True).start()
+        if not self.connected.wait(timeout):
+            self.close()
+            raise Exception(f'Server {self.host}:{self.port} did not answer within {timeout}s')
+        if self.error is not None:
+            raise self.error
+
+    async def run(self):
+        """
+        Join the server and receive its snapshots until the connection ends
+
+        Errors are stored in ```error``` (```start()``` raises them if they happen while joining)
+        """
+        try:
+            reader, self.writer = await asyncio.open_connection(self.host, self.port)
+            self.writer.write((json.dumps({'join': self.team_id}) + '\n').encode())
+            line = await reader.readline()
+            if not line:
+                raise Exception(f'Server {self.host}:{self.port} closed the connection')
+            hello = json.loads(line)
+            if 'error' in hello:
+                raise Exception(f'Server {self.host}:{self.port} refused to join: {hello["error"]}')
+            self.team_id, self.rate = hello['team'], hello['rate']
+            self.connected.set()
+
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                self.bytes += len(line)
+                self.receive(json.loads(line))
+        except Exception as e:
+            self.error = e
+        finally:
+            self.closed.set()
+            self.connected.set()
+
+    def receive(self, msg):
+        """
+        Apply a snapshot received from the server
+        """
+        with self.lock:
+            if msg['k']:
+                self.key_entries = msg['e']
+                self.entries = {}
+            elif msg.get('rel') == 'key':
+                self.entries = dict(self.key_entries)
+            self.entries.update(msg['e'])
+            self.history.append((msg['t'], time.time(), P(*self.entries['b']), dict(self.entries)))
+            self.history = self.history[-(self.interp + 2):]
+            if msg['ack'] is not None:
+                self.rtt = time.time() - msg['ack']
+
+    def send(self, action):
+        """
+        Send the selected player's action to the server
+        """
+        if self.writer is not None and self.team_id:
+            msg = (json.dumps({'a': action, 'ts': time.time()}) + '\n').encode()
+            self.loop.call_soon_threadsafe(self.writer.write, msg)
+
+    def interpolate(self):
+        """
+        Return the state to render as (entries, ball position)
+
+        Positions are linearly interpolated between the 2 snapshots around the render time,
+        which lags the estimated server tick by ```interp``` ticks
+        """
+        with self.lock:
+            if not self.history:
+                return None, None
+            tick, recv, _, _ = self.history[-1]
+            render_tick = tick + (time.time() - recv)*self.rate - self.interp
+
+            prev = self.history[0]
+            for snap in self.history[1:]:
+                if snap[0] >= render_tick:
+                    alpha = min(max((render_tick - prev[0])/max(snap[0] - prev[0], 1), 0), 1)
+                    entries = dict(snap[3])
+                    for k, v in snap[3].items():
+                        if k in prev[3] and k not in ('g', 'b'):
+                            p0 = prev[3][k]
+                            entries[k] = [p0[0] + alpha*(v[0]-p0[0]), p0[1] + alpha*(v[1]-p0[1])] + v[2:]
+                    ball = prev[2] + P(alpha, alpha)*(snap[2] - prev[2])
+                    return entries, ball
+                prev = snap
+            return dict(prev[3]), prev[2]
+
+    def close(self):
+        if self.writer is not None:
+            self.loop.call_soon_threadsafe(self.writer.close)
@@ -0,0 +1,245 @@
+"""
+Observations of the game for agents
+
+- ```TeamObservation``` is the game seen by one team as NumPy arrays (passed to ```Team.move_batch()```)
+- ```ObservationRenderer``` renders headless pixel observations (for vision-based agents)
+
+The renderer draws the same world state as ```Game.draw()``` into a small, preallocated NumPy buffer:
+
+- No window, fonts, sprites or camera are involved (the whole pitch is always visible)
+- Many matches are rendered into one batch (the first axis of the buffer is the match)
+
+Two modes are supported:
+
+- 'rgb': (matches, height, width, 3) uint8 images
+- 'planes': (matches, len(PLANES), height, width) float32 feature planes (1 where the entity is, 0 elsewhere)
+"""
+
+from settings import *
+from functools import cached_property
+import numpy as np
+
+MODES = ['rgb', 'planes']
+PLANES = ['team1', 'team2', 'ball']  # Feature planes in 'planes' mode (in order)
+BALL_COLOR = (42, 42, 42)  # Same as the overlay (minimap)
+
+
+def vector_size(num_team, num_enemy):
+    """
+    Length of ```TeamObservation.vector()``` for teams of the given sizes
+    """
+    return 2*num_team + 2*num_enemy + 5
+
+
+def disc(radius):
+    """
+    Offsets (dy, dx) of the pixels covered by a disc of the given radius (at least its center pixel)
+    """
+    r = max(int(math.ceil(radius)), 0)
+    dy, dx = np.mgrid[-r:r + 1, -r:r + 1]
+    inside = dy*dy + dx*dx <= max(radius, 0.5)**2
+    return dy[inside], dx[inside]
+
+
+class TeamObservation:
+    """
+    The game seen by one team (arrays are built when first used)
+    """
+
+    def __init__(self, game, team_id):
+        """
+        Attributes:
+            game (Game): The game being observed
+            team_id (int): The observing team (1 or 2)
+
+        The game's state objects are kept for teams that implement ```move()``` (see ```Team.move_batch()```)
+        """
+        self.game = game
+        self.team_id = team_id
+        self.state_prev = game.state_prev
+        self.state = game.state
+        self.reward = game.rewards
+        self.own = game.team1 if team_id == 1 else game.team2
+        self.other = game.team2 if team_id == 1 else game.team1
+        self.goal_x = self.own.goal_x  # x-coordinate of the team's goal
+        self.enemy_goal_x = self.other.goal_x
+
+    @cached_property
+    def team(self):
+        """
+        Positions of the team's players (np.array of shape (players, 2), ordered like ```team.players```)
+        """
+        return np.array([(player.pos.x, player.pos.y) for player in self.own.players], dtype=float).reshape(-1, 2)
+
+    @cached_property
+    def enemy(self):
+        """
+        Positions of the enemy's players (np.array of shape (players, 2))
+        """
+        return np.array([(player.pos.x, player.pos.y) for player in self.other.players], dtype=float).reshape(-1, 2)
+
+    @cached_property
+    def ball(self):
+        """
+        Position and velocity of the ball (np.array [x, y, vx, vy])
+        """
+        ball = self.game.ball
+        return np.array([ball.pos.x, ball.pos.y, ball.vel.x, ball.vel.y], dtype=float)
+
+    @cached_property
+    def to_ball(self):
+        """
+        Distance of each of the team's players to the ball (np.array)
+        """
+        return np.array(self.game.dists.ball[self.team_id], dtype=float)
+
+    @property
+    def owner(self):
+        """
+        Index of the team's player holding the ball (-1 if the ball is free or held by the enemy)
+        """
+        bs = self.game.ball.ball_stats
+        return self.own.index[bs['player']] if not self.game.ball.free and bs['team'] == self.team_id else -1
+
+    def vector(self, out=None):
+        """
+        The observation as a flat vector (of length ```vector_size()```)
+
+        Positions of the team's players, of the enemy's players and of the ball (divided by the field size),
+        the ball's velocity and who holds the ball (1 for the team, -1 for the enemy, 0 if free)
+
+        Attributes:
+            out (np.array): Written in place if given (e.g. a row of a shared buffer)
+        """
+        n, m = len(self.own.players), len(self.other.players)
+        if out is None:
+            out = np.empty(vector_size(n, m), dtype=np.float32)
+        out[:2*n] = (self.team/(W, H)).ravel()
+        out[2*n:2*(n+m)] = (self.enemy/(W, H)).ravel()
+
+        ball, bs = self.game.ball, self.game.ball.ball_stats
+        holder = 0 if ball.free or bs['team'] not in (1, 2) else (1 if bs['team'] == self.team_id else -1)
+        out[2*(n+m):] = (ball.pos.x/W, ball.pos.y/H, ball.vel.x, ball.vel.y, holder)
+        return out
+
+
+class ObservationRenderer:
+    """
+    Renders low-resolution observations of one or more games into a reusable buffer
+    """
+
+    def __init__(self, num_games=1, size=OBS_SIZE, mode='rgb'):
+        """
+        Allocate the observation buffer
+
+        Attributes:
+            num_games (int): Maximum number of games rendered in one batch
+            size (P): Width and height of each observation (in pixels)
+            mode (str): One of ```MODES```
+        """
+        if mode not in MODES:
+            raise Exception(f'Unknown observation mode {mode} (must be one of {MODES})')
+
+        self.size = P(size)
+        self.mode = mode
+        self.num_games = num_games
+        self.scale = P(self.size.x/W, self.size.y/H)
+
+        if mode == 'rgb':
+            self.buf = np.zeros((num_games, self.size.y, self.size.x, 3), dtype=np.uint8)
+        else:
+            self.buf = np.zeros((num_games, len(PLANES), self.size.y, self.size.x), dtype=np.float32)
+
+        radius = lambda r: r*(self.scale.x + self.scale.y)/2
+        self.discs = [disc(radius(PLAYER_RADIUS)), disc(radius(PLAYER_RADIUS)), disc(radius(BALL_RADIUS))]
+        self.backgrounds = {}  # (team1 color, team2 color): pitch image
+
+    def background(self, color1, color2):
+        """
+        Image of the empty pitch (same elements as ```Game.field_draw()```), cached per pair of team colors
+        """
+        key = (tuple(color1), tuple(color2))
+        if key not in self.backgrounds:
+            sx, sy = self.scale.x, self.scale.y
+            lw = max(1, round(LINE_WIDTH*min(sx, sy)))
+            rect = lambda x, y, w, h: pygame.Rect(int(x*sx), int(y*sy), max(1, round(w*sx)), max(1, round(h*sy)))
+
+            s = pygame.Surface(self.size.val)
+            s.fill((14, 156, 23))  # green ground
+            pygame.draw.rect(s, (255, 255, 255), (0, 0, self.size.x, self.size.y), lw)  # border
+            pygame.draw.rect(s, (255, 255, 255), rect(W//2 - LINE_WIDTH//2, 0, LINE_WIDTH, H))  # mid line
+            pygame.draw.ellipse(s, (255, 255, 255), rect(W//2 - H//10, H//2 - H//10, H//5, H//5), lw)  # mid circle
+            pygame.draw.rect(s, (255, 255, 255), rect(0.9*W, 0.2*H, 0.1*W, 0.6*H), lw)  # right D
+            pygame.draw.rect(s, (255, 255, 255), rect(0, 0.2*H, 0.1*W, 0.6*H), lw)  # left D
+            pygame.draw.rect(s, (255, 255, 255), rect(0.95*W, GOAL_POS[0]*H, 0.05*W,
+                                                      (GOAL_POS[1]-GOAL_POS[0])*H), lw)  # right penalty
+            pygame.draw.rect(s, (255, 255, 255), rect(0, GOAL_POS[0]*H, 0.05*W,
+                                                      (GOAL_POS[1]-GOAL_POS[0])*H), lw)  # left penalty
+            pygame.draw.rect(s, color2, rect(W - 3*LINE_WIDTH, GOAL_POS[0]*H, 3*LINE_WIDTH,
+                                             (GOAL_POS[1]-GOAL_POS[0])*H))  # right goal
+            pygame.draw.rect(s, color1, rect(0, GOAL_POS[0]*H, 3*LINE_WIDTH,
+                                             (GOAL_POS[1]-GOAL_POS[0])*H))  # left goal
+
+            self.backgrounds[key] = pygame.surfarray.array3d(s).transpose(1, 0, 2).copy()  # (height, width, 3)
+        return self.backgrounds[key]
+
+    def pixels(self, pos, disc):
+        """
+        Pixels covered by entities centered at the given positions
+
+        Attributes:
+            pos (np.array): (n, 2) positions on the field
+            disc (tuple): Offsets of the pixels covered by one entity (see ```disc()```)
+
+        Returns (entity, y, x) index arrays
+        """
+        cx = np.clip((pos[:, 0]*self.scale.x).astype(int), 0, self.size.x - 1)
+        cy = np.clip((pos[:, 1]*self.scale.y).astype(int), 0, self.size.y - 1)
+        dy, dx = disc
+        ys = np.clip(cy[:, None] + dy, 0, self.size.y - 1)
+        xs = np.clip(cx[:, None] + dx, 0, self.size.x - 1)
+        entity = np.repeat(np.arange(len(pos)), len(dy))
+        return entity, ys.ravel(), xs.ravel()
+
+    def render(self, games):
+        """
+        Render the given games (at most ```num_games```) into the buffer
+
+        Attributes:
+            games (list): The games to render (observation i is of games[i])
+
+        Returns a view of the buffer (only valid until the next call)
+        """
+        n = len(games)
+        if n > self.num_games:
+            raise Exception(f'Can not render {n} games into a buffer for {self.num_games}')
+        buf = self.buf[:n]
+
+        if self.mode == 'rgb':
+            for i, game in enumerate(games):
+                buf[i] = self.background(game.team1.color, game.team2.color)
+        else:
+            buf[:] = 0
+
+        # Entities of all the games are drawn together (one kind at a time so that the ball is on top)
+        for plane, disc in enumerate(self.discs):
+            entities = []  # (game index, position, color)
+            for i, game in enumerate(games):
+                if plane == 2:
+                    entities.append((i, game.ball.pos, BALL_COLOR))
+                else:
+                    team = game.team1 if plane == 0 else game.team2
+                    entities += [(i, player.pos, team.color) for player in team.players]
+            if not entities:
+                continue
+
+            pos = np.array([(p.x, p.y) for _, p, _ in entities], dtype=float)
+            entity, ys, xs = self.pixels(pos, disc)
+            game_idx = np.array([i for i, _, _ in entities])[entity]
+
+            if self.mode == 'rgb':
+                buf[game_idx, ys, xs] = np.array([col[:3] for _, _, col in entities], dtype=np.uint8)[entity]
+            else:
+                buf[game_idx, plane, ys, xs] = 1
+
+        return buf
@@ -6,59 +6,128 @@ Use this to play the game
 
 import time
 from settings import *
-from pygame import mixer
 import pygame_menu
 from game import Game
 from teams.human import HumanTeam
 from teams.original_ai import OriginalAITeam
+from teams.planning_ai import PlanningAITeam
 from teams.random import RandomTeam
 from menu import play_with_menu
 from args import get_args
+from audio import audio
+from network import GameClient, apply_snapshot
 
 args = get_args()
 
+def display_init(windowed, vsync):
+    """
+    Open the window (or go fullscreen)
+
+    Everything is drawn on a ```SCREEN_W``` x ```SCREEN_H``` surface (see ```RENDER_SIZE```)
+    which SDL scales to the window / monitor on the GPU
+    """
+    flags = pygame.RESIZABLE if windowed else pygame.FULLSCREEN
+    # Fall back to vsync off, then to software rendering, when the GPU renderer is not available
+    for scaled, vsync in ((pygame.SCALED, int(vsync)), (pygame.SCALED, 0), (0, 0)):
+        try:
+            return pygame.display.set_mode((SCREEN_W, SCREEN_H), flags | scaled, vsync=vsync)
+        except pygame.error:
+            pass
+    raise Exception('Could not open a window')
+
 pygame.init()
-win = pygame.display.set_mode((W, H), pygame.FULLSCREEN)
+win = display_init(args.windowed, not args.vsync_off)
 clock = pygame.time.Clock()
 pygame.display.set_caption("FIFA-42")
 
-# Init music
-mixer.init(44100, -16, 2, 2048)
-menu_music = mixer.Sound(MENU_MUSIC)
-
 # Define teams (Team 1 faces right by default)
-team1 = HumanTeam(formation=args.team1_form, color=(0, 32, 255))
+if args.demo:
+    team1 = OriginalAITeam(formation=args.team1_form, color=(0, 32, 255))
+else:
+    team1 = HumanTeam(formation=args.team1_form, color=(0, 32, 255))
 if args.opponent == 'AI':
     team2 = OriginalAITeam(formation=args.team2_form, color=(255, 128, 0))
+elif args.opponent == 'planning':
+    team2 = PlanningAITeam(formation=args.team2_form, color=(255, 128, 0))
 else:
     team2 = RandomTeam(formation=args.team2_form, color=(255, 128, 0))
 
 no_team = RandomTeam(ids=[])
 
+def turbo_draw(frame, next_draw):
+    """
+    In turbo mode, whether to draw this frame (every ```--draw_every``` frames or ```--draw_fps``` times per second)
+
+    Returns (draw, time of the next drawing)
+    """
+    if args.draw_every:
+        return frame % args.draw_every == 0, next_draw
+    now = time.perf_counter()
+    if now < next_draw:
+        return False, next_draw
+    return True, now + 1/args.draw_fps
+
+def full_time(win, game):
+    """
+    Show the final score and statistics (for ```FULL_TIME_WAIT``` ms or until a key is pressed)
+    """
+    game.draw(win)
+    game.pause_draw(win, title='Full Time')
+    pygame.display.update()
+    audio.flush()
+
+    deadline = pygame.time.get_ticks() + FULL_TIME_WAIT
+    while pygame.time.get_ticks() < deadline:
+        event = pygame.event.wait(max(deadline - pygame.time.get_ticks(), 1))
+        if event.type == pygame.QUIT:
+            pygame.event.post(event)  # handled by the menu
+            break
+        if event.type in (pygame.KEYDOWN, pygame.MOUSEBUTTONDOWN):
+            break
+
 def play(win, team1, team2, sound, difficulty, cam):  # Play the entire game
-    mixer.stop()
-    game = Game(team1, team2, sound, difficulty, cam)  # initialize the game
+    audio.stop()
+    game = Game(team1, team2, sound, difficulty, cam,
+                match_frames=int(60*args.match_length*args.fps), halves=args.halves)  # initialize the game
+    game.turbo = args.turbo
+    frame, next_draw = 0, 0
     """ Game loop """
     while not game.end:  # Game loop
-        clock.tick(args.fps)  # FPS
-
-        game.check_interruptions()  # Check for special keys (quit, pause, etc)
-
+        if game.pause:  # Sleep until an event arrives (nothing changes on screen until then)
+            game.check_interruptions([pygame.event.wait()] + pygame.event.get())
+        else:
+            clock.tick(0 if game.turbo else args.fps)  # FPS (as fast as possible in turbo mode)
+            game.check_interruptions()  # Check for special keys (quit, pause, etc)
+        if game.end:
+            break
+
+        draw = True
         if game.pause:  # game is paused - display pause menu
-            game.draw(win)
-            game.pause_draw(win)  # Draws on-top of the (frozen) game
+            game.pause_frame(win)  # Draws on-top of the (frozen) game
         else:  # Continue with the game
-            game.draw(win)
+            if game.turbo:  # Only some frames are drawn
+                draw, next_draw = turbo_draw(frame, next_draw)
+            if draw:
+                game.draw(win)
             game.next()
+            frame += 1
 
-        pygame.display.update()  # refresh screen
+        if draw:
+            pygame.display.update()  # refresh screen
+        audio.flush()  # play sounds queued during this frame
+
+    if game.full_time:
+        full_time(win, game)
+
+    if args.heatmap_out:
+        game.heatmap.export(args.heatmap_out)
 
     global game_menu
     if not args.menu_off:
         game_menu.start()  # Return to main menu
 
 def practice():
-    mixer.stop()
+    audio.stop()
 
     game = Game(team1, no_team, sound=False)  # initialize the game
     """ Game loop """
@@ -72,12 +141,48 @@ def practice():
         game.next()
 
         pygame.display.update()  # refresh screen
+        audio.flush()  # play sounds queued during this frame
 
     global game_menu
     game_menu.start()  # Return to main menu
 
+def online(win, host, port, team_id, cam):  # Play on a game server
+    client = GameClient(host, port, team_id=team_id)
+    client.start()
+
+    # Local game, only used for drawing the server's snapshots
+    local1 = HumanTeam(color=team1.color) if client.team_id == 1 else RandomTeam(color=team1.color)
+    local2 = HumanTeam(color=team2.color) if client.team_id == 2 else RandomTeam(color=team2.color)
+    game = Game(local1, local2, sound=False, cam=cam)
+    human = {1: local1, 2: local2}.get(client.team_id)
+
+    """ Game loop """
+    while not game.end:  # Game loop
+        clock.tick(args.fps)  # FPS
+
+        game.check_interruptions()  # Check for special keys (quit, return to menu)
+        if game.end or client.closed.is_set():  # quit or disconnected from the server
+            break
+
+        if human is not None:
+            client.send(human.players[0].move(None, None, None))  # keyboard action of the selected player
+
+        entries, ball = client.interpolate()
+        if entries:
+            apply_snapshot(game, entries, ball)
+            if human is not None:
+                human.select_player(game.ball)
+
+        game.draw(win)
+        pygame.display.update()  # refresh screen
+
+    client.close()
+
 # Run the game
-if args.menu_off:
+if args.connect:
+    host, _, port = args.connect.partition(':')
+    online(win, host, int(port or NET_PORT), team_id=args.team, cam=args.camera)
+elif args.menu_off:
     play(win, team1, team2, sound=not args.sound_off, difficulty=args.difficulty/100, cam=args.camera)
 else:
     game_menu = play_with_menu(win, team1, team2, play, practice,
@@ -0,0 +1,246 @@
+"""
+Batched policy inference for many concurrent matches
+
+When many matches are played by the same policy, the decisions of all of them are taken in one forward pass:
+
+- ```MLPPolicy``` is a small feed-forward policy written with NumPy matrix operations
+- ```PolicyServer``` collects the pending decision requests of the matches and scatters the actions back.
+  Requests come from ```PolicyTeam```s (matches running in threads of this process, see ```request()```)
+  or from the games of a ```VecEnv``` (matches running in worker processes, see ```run()```)
+
+A request waits at most ```max_latency``` seconds for others to be batched with it
+"""
+
+from settings import *
+from const import Action, ACT_DTYPE
+from observation import vector_size
+import numpy as np
+import threading
+import queue
+import time
+
+
+class MLPPolicy:
+    """
+    Feed-forward policy (1 hidden layer) choosing the most likely action of each player
+    """
+
+    def __init__(self, obs_size=vector_size(NUM_TEAM, NUM_TEAM), num_players=NUM_TEAM, hidden=POLICY_HIDDEN,
+                 weights=None, seed=0):
+        """
+        Attributes:
+            obs_size (int): Length of the observations (see ```TeamObservation.vector()```)
+            num_players (int): Number of players controlled
+            hidden (int): Number of hidden units
+            weights (dict): Arrays 'w1', 'b1', 'w2' and 'b2' (randomly initialized if not given)
+            seed (int): Seed of the random initialization
+        """
+        self.num_players = num_players
+        if weights is None:
+            rng = np.random.default_rng(seed)
+            out = num_players*len(Action)
+            weights = {
+                'w1': rng.normal(0, 1/np.sqrt(obs_size), (obs_size, hidden)),
+                'b1': np.zeros(hidden),
+                'w2': rng.normal(0, 1/np.sqrt(hidden), (hidden, out)),
+                'b2': np.zeros(out),
+            }
+        self.weights = {k: np.asarray(v, dtype=np.float32) for k, v in weights.items()}
+
+    @classmethod
+    def load(cls, path):
+        """
+        Load a policy saved with ```save()```
+        """
+        with np.load(path) as data:
+            weights = {k: data[k] for k in ('w1', 'b1', 'w2', 'b2')}
+        return cls(weights['w1'].shape[0], weights['b2'].shape[0]//len(Action), weights['b1'].shape[0], weights)
+
+    def save(self, path):
+        """
+        Save the weights (as a .npz file)
+        """
+        np.savez(path, **self.weights)
+
+    def __call__(self, obs):
+        """
+        Decide the actions of a batch of observations (np.array of shape (batch, obs_size))
+
+        Returns an array of ```Action``` codes of shape (batch, num_players)
+        """
+        w = self.weights
+        hidden = np.tanh(np.asarray(obs, dtype=np.float32) @ w['w1'] + w['b1'])
+        logits = (hidden @ w['w2'] + w['b2']).reshape(len(obs), self.num_players, len(Action))
+        return logits.argmax(axis=2).astype(ACT_DTYPE)
+
+
+class Request:
+    """
+    A pending decision (filled in by the server)
+    """
+
+    def __init__(self, obs):
+        self.obs = obs
+        self.actions = None
+        self.error = None  # exception raised while computing its batch (if any)
+        self.done = threading.Event()
+
+
+class PolicyServer:
+    """
+    Runs a policy on batches of decision requests
+    """
+
+    def __init__(self, policy, max_batch=None, max_latency=POLICY_MAX_LATENCY):
+        """
+        Attributes:
+            policy (callable): Maps a batch of observations to a batch of actions (e.g. ```MLPPolicy```)
+            max_batch (int): Largest batch (defaults to the number of registered clients i.e. every match)
+            max_latency (float): Maximum time (in seconds) a request waits for others to be batched with it
+        """
+        self.policy = policy
+        self.max_batch = max_batch
+        self.max_latency = max_latency
+        self.clients = 0
+        self.requests = queue.Queue()
+        self.thread = None
+        self.running = False
+        self.batches = 0  # Number of forward passes (batch sizes are averaged in ```mean_batch```)
+        self.decisions = 0
+
+    @property
+    def mean_batch(self):
+        """
+        Average number of decisions per forward pass
+        """
+        return self.decisions/self.batches if self.batches else 0
+
+    def register(self):
+        """
+        Called by every client (e.g. ```PolicyTeam```) so that full batches are not delayed
+        """
+        self.clients += 1
+
+    def unregister(self):
+        """
+        Called by clients that will not send requests anymore (e.g. when their match ends)
+        """
+        self.clients = max(self.clients - 1, 0)
+
+    def batch_size(self):
+        """
+        Number of requests that make a full batch
+        """
+        return self.max_batch or max(self.clients, 1)
+
+    def infer(self, obs):
+        """
+        One forward pass on a batch of observations
+        """
+        self.batches += 1
+        self.decisions += len(obs)
+        return self.policy(obs)
+
+    def start(self):
+        """
+        Start serving the requests of in-process clients (in a background thread)
+        """
+        if self.thread is None:
+            self.running = True
+            self.thread = threading.Thread(target=self.serve, daemon=True)
+            self.thread.start()
+        return self
+
+    def stop(self):
+        """
+        Stop the background thread (pending requests are still answered)
+        """
+        if self.thread is not None:
+            self.running = False
+            self.requests.put(None)
+            self.thread.join()
+            self.thread = None
+
+    def request(self, obs, timeout=None):
+        """
+        Decide the actions for a single observation (blocks until its batch is computed)
+
+        Called from the thread running the match, the server must be started.
+        Raises the policy's exception if its batch failed, or an exception if it is not computed within
+        ```timeout``` seconds (None waits forever)
+        """
+        if self.thread is None:
+            raise Exception('The policy server is not running (call start() first)')
+        req = Request(obs)
+        self.requests.put(req)
+        if not req.done.wait(timeout):
+            raise Exception(f'The policy server did not answer within {timeout}s')
+        if req.error is not None:
+            raise req.error
+        return req.actions
+
+    def serve(self):
+        """
+        Batch the queued requests (until the batch is full or its first request waited ```max_latency```)
+        """
+        while self.running or not self.requests.empty():
+            first = self.requests.get()
+            if first is None:
+                continue
+            batch = [first]
+            deadline = time.perf_counter() + self.max_latency
+            while len(batch) < self.batch_size():
+                try:
+                    req = self.requests.get(timeout=max(deadline - time.perf_counter(), 0))
+                except queue.Empty:
+                    break
+                if req is None:
+                    break
+                batch.append(req)
+
+            try:
+                actions = self.infer(np.stack([req.obs for req in batch]))
+            except Exception as e:  # fail the batch's requests, keep serving the others
+                for req in batch:
+                    req.error = e
+                    req.done.set()
+                continue
+            for req, act in zip(batch, actions):
+                req.actions = act
+                req.done.set()
+
+    def run(self, env, frames):
+        """
+        Play every game of a ```VecEnv``` (games in worker processes) with the policy
+
+        Attributes:
+            env (VecEnv): The games (in 'sync' mode every game is decided in one batch each frame)
+            frames (int): Number of frames to play in each game
+
+        Returns the total reward of each game
+        """
+        obs = env.reset()
+        total = np.zeros(env.num_games)
+        if env.mode == 'sync':
+            for _ in range(frames):
+                obs, reward, done = env.step(self.infer(obs))
+                total += reward
+            return total
+
+        # 'async': games are decided as soon as a batch of them is ready (or the first one waited too long)
+        steps = np.zeros(env.num_games, dtype=int)
+        env.send(self.infer(obs))
+        size = self.max_batch or env.num_games
+        while env.busy:
+            obs, reward, done, ids = env.recv()
+            deadline = time.perf_counter() + self.max_latency
+            while len(ids) < size and env.busy and time.perf_counter() < deadline:
+                more = env.recv(timeout=max(deadline - time.perf_counter(), 0))
+                obs, reward, done, ids = [np.concatenate(pair) for pair in zip((obs, reward, done, ids), more)]
+
+            steps[ids] += 1
+            total[ids] += reward
+            ids, obs = ids[steps[ids] < frames], obs[steps[ids] < frames]
+            if len(ids):
+                env.send(self.infer(obs), ids)
+        return total
@@ -0,0 +1,254 @@
+"""
+Cheap snapshots of the game's state
+
+- ```GameState``` copies everything that ```Game.move_next()``` depends on into a preallocated buffer
+- ```Rollback``` keeps the last few states and inputs to rewind and re-simulate frames (rollback netcode)
+
+The planning state of teams that have one (```save_plan()```, e.g. ```PlanningAITeam```) is copied along (as Python objects).
+Not captured: the heatmaps and anything that is only used for drawing (sprites, camera)
+
+A restored game replays identically (same random numbers, same decisions) as long as its teams only decide from
+the game's state: no wall-clock time budgets and no state kept between frames that is not saved here.
+The built-in AI teams (original, planning) follow these rules, their budgets are counted in players updated or rollouts
+
+```python3 rollback.py``` plays an AI match and checks that re-simulating frames with unchanged inputs
+(```Rollback.check()```) gives back the same state
+"""
+
+from settings import *
+from const import Action
+import numpy as np
+
+DIRS = {'L': 0, 'R': 1}
+DIR_NAMES = ['L', 'R']
+
+BALL_SIZE = 10 # pos (2), vel (2), free, dir, ball_stats (4)
+STATS_SIZE = 12 # pos (2), goals (2), pass_acc (4), shot_acc (4)
+CLOCK_SIZE = 2 # frame, full_time
+PLAYER_SIZE = 4 # pos (2), walk_dir, walk_count
+SCHEDULE_SIZE = 1 # frame (followed by the last move of each player, -1 if none), only used by teams with a scheduler
+
+
+class GameState:
+    """
+    Preallocated buffer holding a copy of the game's state
+    """
+
+    def __init__(self, game):
+        """
+        Allocate a buffer large enough for the given game
+
+        Attributes:
+            game (Game): The game whose state will be stored
+        """
+        num_players = len(game.team1.players) + len(game.team2.players)
+        size = BALL_SIZE + STATS_SIZE + 2 + CLOCK_SIZE + PLAYER_SIZE*num_players
+        self.schedule_start = size
+        for team in (game.team1, game.team2):
+            if hasattr(team, 'last_move'):
+                size += SCHEDULE_SIZE + len(team.players)
+        self.data = np.zeros(size)
+        self.plans = [None, None]  # planning state of each team (if any)
+        self.rng = None
+        self.frame = -1
+
+    def save(self, game, frame=-1):
+        """
+        Copy the game's state into the buffer
+
+        Attributes:
+            game (Game): The game to save
+            frame (int): The frame number (used by ```Rollback```)
+        """
+        ball, stats = game.ball, game.stats
+        bs = ball.ball_stats
+        vals = [
+            ball.pos.x, ball.pos.y, ball.vel.x, ball.vel.y, ball.free,
+            DIRS.get(getattr(ball, 'dir', None), -1),
+            bs['last_player'], bs['last_team'], bs['player'], bs['team'],
+
+            stats.pos[1], stats.pos[2], stats.goals[1], stats.goals[2],
+            stats.pass_acc[1]['succ'], stats.pass_acc[1]['fail'], stats.pass_acc[2]['succ'], stats.pass_acc[2]['fail'],
+            stats.shot_acc[1]['succ'], stats.shot_acc[1]['fail'], stats.shot_acc[2]['succ'], stats.shot_acc[2]['fail'],
+
+            getattr(game.team1, 'selected', -1), getattr(game.team2, 'selected', -1),
+            game.frame, game.full_time,
+        ]
+        for team in (game.team1, game.team2):
+            for player in team.players:
+                vals += [player.pos.x, player.pos.y, DIRS[player.walk_dir], player.walk_count]
+        for team in (game.team1, game.team2):
+            if hasattr(team, 'last_move'):
+                vals += [team.frame] + [-1 if move is None else int(move) for move in team.last_move]
+
+        self.data[:] = vals
+        self.plans = [team.save_plan() if hasattr(team, 'save_plan') else None for team in (game.team1, game.team2)]
+        self.rng = random.getstate()
+        self.frame = frame
+        return self
+
+    def load(self, game):
+        """
+        Overwrite the game's state with the one stored in the buffer
+        """
+        vals = self.data.tolist()
+        ball, stats = game.ball, game.stats
+        bs = ball.ball_stats
+
+        ball.pos = P(vals[0], vals[1])
+        ball.vel = P(vals[2], vals[3])
+        ball.free = bool(vals[4])
+        if vals[5] >= 0:
+            ball.dir = DIR_NAMES[int(vals[5])]
+        bs['last_player'], bs['last_team'], bs['player'], bs['team'] = [int(v) for v in vals[6:10]]
+
+        i = BALL_SIZE
+        stats.pos[1], stats.pos[2], stats.goals[1], stats.goals[2] = [int(v) for v in vals[i:i+4]]
+        stats.pass_acc[1]['succ'], stats.pass_acc[1]['fail'], stats.pass_acc[2]['succ'], stats.pass_acc[2]['fail'] = \
+            [int(v) for v in vals[i+4:i+8]]
+        stats.shot_acc[1]['succ'], stats.shot_acc[1]['fail'], stats.shot_acc[2]['succ'], stats.shot_acc[2]['fail'] = \
+            [int(v) for v in vals[i+8:i+12]]
+
+        i += STATS_SIZE + 2  # selected players (see ```load_decisions()```)
+        game.frame, game.full_time = int(vals[i]), bool(vals[i+1])
+
+        i += CLOCK_SIZE
+        for team in (game.team1, game.team2):
+            for player in team.players:
+                player.pos = P(vals[i], vals[i+1])
+                player.walk_dir = DIR_NAMES[int(vals[i+2])]
+                player.walk_count = int(vals[i+3])
+                i += PLAYER_SIZE
+
+        self.load_decisions(game)
+        game.refresh()  # derived from the restored positions
+
+    def load_decisions(self, game):
+        """
+        Overwrite only what the teams decide from (besides the game): their selected player, their scheduler,
+        their planning state and the random state
+        """
+        i = BALL_SIZE + STATS_SIZE
+        for team, selected in ((game.team1, self.data[i]), (game.team2, self.data[i+1])):
+            if selected >= 0:
+                team.selected = int(selected)
+
+        vals = self.data[self.schedule_start:].tolist()
+        i = 0
+        for team in (game.team1, game.team2):
+            if hasattr(team, 'last_move'):
+                team.frame = int(vals[i])
+                team.last_move = [Action(int(v)) if v >= 0 else None for v in vals[i+1:i+1+len(team.players)]]
+                i += SCHEDULE_SIZE + len(team.players)
+
+        for team, plan in zip((game.team1, game.team2), self.plans):
+            if plan is not None:
+                team.load_plan(plan)
+
+        random.setstate(self.rng)
+
+
+class Rollback:
+    """
+    Ring buffer of game states and inputs used to rewind and re-simulate the game
+
+    Call ```step()``` instead of ```Game.move_next()``` and ```correct()``` when a late input arrives
+    """
+
+    def __init__(self, game, size=ROLLBACK_FRAMES):
+        """
+        Attributes:
+            game (Game): The game to control
+            size (int): Maximum number of frames that can be rolled back
+        """
+        self.game = game
+        self.size = size
+        self.states = [GameState(game) for _ in range(size)]
+        self.inputs = [None]*size
+        self.current = GameState(game)  # state before a correction (the teams' decisions are kept from it)
+        self.frame = 0
+
+    def step(self, a1, a2):
+        """
+        Save the current state and move the game forward by 1 frame with the given actions
+        """
+        self.states[self.frame % self.size].save(self.game, self.frame)
+        self.inputs[self.frame % self.size] = (a1, a2)
+        self.frame += 1
+        return self.game.move_next(a1, a2)
+
+    def correct(self, frame, a1=None, a2=None):
+        """
+        Replace a past frame's actions and re-simulate every frame since
+
+        Attributes:
+            frame (int): The frame whose input changed (must be one of the last ```size``` frames)
+            a1 (list): Corrected actions of team 1 (None keeps the recorded ones)
+            a2 (list): Corrected actions of team 2 (None keeps the recorded ones)
+
+        Sounds are muted while re-simulating and the re-simulated frames are not added to the heatmaps
+        (they were already counted when first played).
+        The teams do not decide again (the recorded inputs are replayed), so their decision state
+        (selected player, scheduler, planning, random state) is kept as it was before the correction
+        """
+        state = self.states[frame % self.size]
+        if state.frame != frame or frame >= self.frame:
+            raise Exception(f'Frame {frame} can not be rolled back')
+
+        old1, old2 = self.inputs[frame % self.size]
+        self.inputs[frame % self.size] = (a1 if a1 is not None else old1, a2 if a2 is not None else old2)
+
+        game = self.game
+        sound, ball_sound = game.sound, game.ball.sound
+        game.sound = game.ball.sound = game.record = False
+        try:
+            self.current.save(game)
+            state.load(game)
+            last, self.frame = self.frame, frame
+            result = None
+            while self.frame < last:
+                result = self.step(*self.inputs[self.frame % self.size])
+            self.current.load_decisions(game)
+        finally:
+            game.sound, game.ball.sound, game.record = sound, ball_sound, True
+        return result
+
+    def check(self, frame):
+        """
+        Re-simulate every frame since the given one with the recorded inputs and check that the game ends up in the
+        same state (byte for byte)
+
+        An exception is raised if the state differs (i.e. something the game depends on is not saved or restored)
+        """
+        before = GameState(self.game).save(self.game)
+        self.correct(frame)
+        after = GameState(self.game).save(self.game)
+        if before.data.tobytes() != after.data.tobytes():
+            diff = np.flatnonzero(before.data != after.data).tolist()
+            raise Exception(f'Re-simulating from frame {frame} changed the state (entries {diff})')
+        if before.rng != after.rng:
+            raise Exception(f'Re-simulating from frame {frame} changed the random state')
+
+
+if __name__ == '__main__':
+    import os
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+    from args import get_rollback_args
+    from game import Game
+    from observation import TeamObservation
+    from teams.original_ai import OriginalAITeam
+    from teams.planning_ai import PlanningAITeam
+
+    args = get_rollback_args()
+    random.seed(args.seed)
+    game = Game(PlanningAITeam(), OriginalAITeam(), sound=False)
+    rollback = Rollback(game)
+    for i in range(args.frames):
+        a1 = game.team1.move_batch(TeamObservation(game, 1))
+        a2 = game.team2.move_batch(TeamObservation(game, 2))
+        game.state_prev, game.state, game.rewards = rollback.step(a1, a2)
+        if i % rollback.size == rollback.size - 1:
+            rollback.check(rollback.frame - rollback.size)
+    print(f'Re-simulated {args.frames} frames from {args.frames//rollback.size} rollbacks, the states are identical')
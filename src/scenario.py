@@ -0,0 +1,190 @@
+"""
+Scenarios (drills) i.e. short episodes that start from a given situation instead of the kick-off
+
+A scenario is a declarative spec (see ```SCENARIOS```):
+
+- The players of each team that take part (by id) and where they stand
+- Who holds the ball, or where the ball is and its velocity
+- How many frames an episode lasts (at most)
+
+Team 1 always attacks (towards the right), each episode ends with one of ```OUTCOMES```.
+Running thousands of them is much cheaper than waiting for the same situations to arise in whole matches
+"""
+
+from settings import *
+from game import Game
+from stats import Stats
+from teams.original_ai import OriginalAITeam
+from collections import Counter
+
+KEEPER_POS = P(W - 2*PLAYER_RADIUS - BALL_RADIUS, H//2)  # Team 2's keeper on his goal line
+
+"""
+Scenarios
+    - 'team1' and 'team2' map the id of each player taking part to his position
+    - 'ball' contains either 'owner' (id of the team 1 player holding the ball)
+      or 'pos' and 'vel' (the ball is free, its velocity is multiplied by BALL_SPEED every frame)
+    - 'jitter' (optional) is the maximum random offset (in pixels) added to every position at the start of an episode
+"""
+SCENARIOS = {
+    'counter-attack': {
+        'name': 'Counter-attack (3 vs 2)',
+        'frames': 420,
+        'team1': {9: P(W//2, H//2), 7: P(W//2 - W//16, H//5), 8: P(W//2 - W//16, 4*H//5)},
+        'team2': {0: KEEPER_POS, 1: P(3*W//4, H//2 - H//10), 2: P(3*W//4, H//2 + H//10)},
+        'ball': {'owner': 9},
+        'jitter': 20,
+    },
+    'corner': {
+        'name': 'Cross from the corner',
+        'frames': 210,
+        'team1': {9: P(W - W//9, 2*H//5), 10: P(W - W//8, 3*H//5), 5: P(3*W//4, H//2)},
+        'team2': {0: KEEPER_POS, 1: P(W - W//15, 2*H//5 + H//20), 2: P(W - W//15, 3*H//5)},
+        'ball': {'pos': P(W - 3*BALL_RADIUS, 3*BALL_RADIUS), 'vel': P(-0.4, 0.9)},  # crossed towards the goal
+        'jitter': 10,
+    },
+    'one-on-one': {
+        'name': '1 vs 1 against the keeper',
+        'frames': 300,
+        'team1': {9: P(3*W//4, H//2)},
+        'team2': {0: KEEPER_POS},
+        'ball': {'owner': 9},
+        'jitter': 40,
+    },
+}
+
+OUTCOMES = [
+    'goal',  # Team 1 scored
+    'conceded',  # Team 2 scored
+    'saved',  # Team 2's keeper holds the ball
+    'lost',  # Another team 2 player holds the ball
+    'out',  # The ball went over an end line (without a goal)
+    'timeout',  # None of the above happened in time
+]
+
+
+class Scenario:
+    """
+    Runs episodes of a scenario (the same game is reused for every episode)
+    """
+
+    def __init__(self, spec, team1=OriginalAITeam, team2=OriginalAITeam, difficulty=0.6, dt=1):
+        """
+        Attributes:
+            spec (str or dict): A key of ```SCENARIOS``` or a spec in the same format
+            team1 (class): Team class of the attacking team
+            team2 (class): Team class of the defending team
+            difficulty (float): Game difficulty (0-1)
+            dt (int): Frames simulated at once (see ```Game```)
+        """
+        if isinstance(spec, str):
+            if spec not in SCENARIOS:
+                raise Exception(f'Unknown scenario {spec} (must be one of {list(SCENARIOS)})')
+            spec = SCENARIOS[spec]
+        if 'owner' in spec['ball'] and spec['ball']['owner'] not in spec['team1']:
+            raise Exception(f'The ball is held by player {spec["ball"]["owner"]} who is not in team 1')
+
+        self.spec = spec
+        self.game = Game(team1(ids=list(spec['team1'])), team2(ids=list(spec['team2'])),
+                         sound=False, difficulty=difficulty, cam='full', dt=dt)
+
+    def place(self):
+        """
+        Put the players and the ball where the spec says (with a random offset of at most ```jitter``` pixels)
+        """
+        game, spec = self.game, self.spec
+        jitter = spec.get('jitter', 0)
+        offset = lambda: P(random.uniform(-jitter, jitter), random.uniform(-jitter, jitter)) if jitter else P(0, 0)
+        clamp = lambda pos, r: P(min(max(r, pos.x), W - r), min(max(r, pos.y), H - r))
+
+        for team, dir in ((game.team1, 'R'), (game.team2, 'L')):
+            team.set_players(team.ids)  # Fresh agents (forgets the AI's scheduled moves and plans)
+            for player in team.players:
+                player.pos = clamp(spec[f'team{team.id}'][player.id] + offset(), PLAYER_RADIUS)
+                player.walk_dir = dir
+                player.walk_count = 0
+
+        ball, bs = game.ball, game.ball.ball_stats
+        bs['last_player'], bs['last_team'] = -1, -1
+        if 'owner' in spec['ball']:
+            player = game.team1.players[game.team1.index[spec['ball']['owner']]]
+            ball.free = False
+            ball.vel = P(0, 0)
+            ball.dir = player.walk_dir
+            ball.pos = player.pos + BALL_OFFSET*BALL_CENTER
+            bs['player'], bs['team'] = player.id, 1
+        else:
+            ball.free = True
+            ball.pos = clamp(spec['ball']['pos'] + offset(), BALL_RADIUS + 1)
+            ball.vel = P(spec['ball'].get('vel', (0, 0)))
+            bs['player'], bs['team'] = -1, -1
+
+        game.stats = Stats()
+        game.refresh()
+        game.state_prev, game.state = game.get_state(), game.get_state()
+
+    def outcome(self, resets):
+        """
+        Outcome of the episode so far (None while it goes on)
+
+        Attributes:
+            resets (int): ```ball.resets``` at the start of the episode
+        """
+        game = self.game
+        bs = game.ball.ball_stats
+        if game.stats.goals[1]:
+            return 'goal'
+        elif game.stats.goals[2]:
+            return 'conceded'
+        elif game.ball.resets != resets:
+            return 'out'
+        elif not game.ball.free and bs['team'] == 2:
+            return 'saved' if bs['player'] == 0 else 'lost'
+        return None
+
+    def run(self, frames=None):
+        """
+        Play one episode
+
+        Attributes:
+            frames (int): Maximum length of the episode (defaults to the spec's)
+
+        Returns a tuple (outcome, frames played)
+        """
+        frames = frames or self.spec['frames']
+        dt = self.game.dt
+        self.place()
+        resets = self.game.ball.resets
+        for frame in range(dt, frames + dt, dt):
+            self.game.next()
+            outcome = self.outcome(resets)
+            if outcome is not None:
+                return outcome, frame
+        return 'timeout', frames
+
+
+def evaluate(spec, episodes, team1=OriginalAITeam, team2=OriginalAITeam, difficulty=0.6, seed=None, dt=1):
+    """
+    Run many episodes of a scenario
+
+    Attributes:
+        spec (str or dict): A key of ```SCENARIOS``` or a spec in the same format
+        episodes (int): Number of episodes
+        team1, team2 (class): Team classes of the attacking and defending teams
+        difficulty (float): Game difficulty (0-1)
+        seed (int): Seed of the random number generator (for reproducible evaluations)
+        dt (int): Frames simulated at once (larger values are faster but less precise, the outcomes change,
+            compare evaluations made with the same dt)
+
+    Returns a dictionary with the number of episodes of each outcome and the average length of an episode
+    """
+    if seed is not None:
+        random.seed(seed)
+    scenario = Scenario(spec, team1, team2, difficulty, dt)
+    counts = Counter({outcome: 0 for outcome in OUTCOMES})
+    total = 0
+    for _ in range(episodes):
+        outcome, frames = scenario.run()
+        counts[outcome] += 1
+        total += frames
+    return {'outcomes': dict(counts), 'episodes': episodes, 'mean_frames': total/max(episodes, 1)}
@@ -0,0 +1,34 @@
+"""
+Headless game server
+
+Runs the authoritative game, clients connect using ```python3 play.py --connect HOST:PORT --team 1```
+
+With ```--broadcast```, streams an AI match that spectators watch using ```--team 0```
+"""
+
+import asyncio
+from settings import *
+from teams.original_ai import OriginalAITeam
+from teams.random import RandomTeam
+from network import GameServer, BroadcastServer, RemoteTeam
+from args import get_server_args
+
+args = get_server_args()
+
+def make_team(kind, color):
+    if kind == 'remote' and not args.broadcast:
+        return RemoteTeam(color=color)
+    elif kind in ('AI', 'remote'):
+        return OriginalAITeam(color=color)
+    else:
+        return RandomTeam(color=color)
+
+async def serve():
+    Server = BroadcastServer if args.broadcast else GameServer
+    server = Server(make_team(args.team1, (0, 32, 255)), make_team(args.team2, (255, 128, 0)),
+                    difficulty=args.difficulty/100, tick_rate=args.tick_rate)
+    port = await server.start(args.host, args.port)
+    print(f'Serving on {args.host}:{port} at {args.tick_rate} ticks/s')
+    await server.run()
+
+asyncio.run(serve())
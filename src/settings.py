@@ -29,10 +29,24 @@ else:
 
 
 ############## Settings ##############
-NUM_TEAM = 11  # Number of players in a team
+STRESS_N = int(os.environ.get('FIFA_STRESS_N', 0))  # Stress mode: players in a team (see stress.py), 0 to play normally
+NUM_TEAM = STRESS_N or 11  # Number of players in a team
+PITCH_SCALE = math.sqrt(NUM_TEAM/11)  # Bigger squads play on a bigger pitch (same area for every player)
 FONT_SIZE = 45
-W = get_monitors()[0].width  # Width
-H = get_monitors()[0].height  # Height
+W = 2*round(640*PITCH_SCALE)  # Width of the field (in logical units, used by the physics and AI on every machine)
+H = 2*round(360*PITCH_SCALE)  # Height of the field
+RENDER_SIZE = P(1280, 720)  # Internal resolution everything is drawn at (SDL scales it to the window), None uses the monitor's
+WINDOWED = False  # Play in a (resizable) window instead of fullscreen
+VSYNC = True  # Wait for the monitor's refresh when showing a frame
+if RENDER_SIZE is not None:
+    SCREEN_W, SCREEN_H = RENDER_SIZE.x, RENDER_SIZE.y  # Size of the drawing surface
+else:
+    try:
+        SCREEN_W = get_monitors()[0].width  # Size of the drawing surface
+        SCREEN_H = get_monitors()[0].height
+    except Exception:  # No monitor (e.g. headless servers)
+        SCREEN_W, SCREEN_H = W, H
+DISPLAY_SCALE = min(SCREEN_W/W, SCREEN_H/H)  # Size of a field unit on the screen (the field is letterboxed)
 
 PLAYER_SELECT_RADIUS = 2
 PLAYER_SELECT_OFFSET = P(0,1.5)
@@ -50,6 +64,8 @@ GOAL_POS = [0.35, 0.65]  # goalpost positions in percentage of H
 LINE_WIDTH = 2
 ANIM_NUM = 7  # Number of images used for running animation
 WALK_DELAY = 3  # Change walking sprite after this many presses
+COLLISION_ITERS = 3  # Maximum number of passes of the collision solver (crowds may need more than one)
+COLLISION_SWEEP = 60  # With more players, only the pairs that are close along the x-axis are checked (sort and sweep)
 
 # Orginal AI related - Difficulty (between 0 and 1) - Easy (0.1) | Medium (0.5) | Hard (0.8)
 AI_FAR_RADIUS = lambda diff: round((2 + 15*diff)*PLAYER_RADIUS) # Far radius to look for ball
@@ -57,6 +73,19 @@ AI_NEAR_RADIUS = lambda diff: round((2 + 4*diff)*PLAYER_RADIUS) # Near radius to
 AI_SHOOT_RADIUS = W//4  # Dist from center of goal post within which AI starts shooting
 AI_MIN_PASS_DIST = 25  # Min perpendicular distance to consider for a successfull pass
 AI_PASS_PROB = 0.95  # Probability that AI moves instead of passing
+AI_SCHED_EVERY = 4  # AI players far away from the ball only decide their move every these many frames
+AI_SCHED_MAX = 3  # Maximum number of far away players an AI team updates per frame
+
+# Planning AI related
+PLAN_FRAMES = 30 # Frames simulated per candidate shot (scaled by difficulty)
+PLAN_ROLLOUTS = 8 # New rollouts a team can simulate per frame (the others come from the cache)
+PLAN_CACHE_CELL = 2*PLAYER_RADIUS # Rollouts are reused while the ball carrier stays in the same cell
+PLAN_CACHE_FRAMES = 6 # Cached rollouts expire after these many frames
+
+# Formation related
+FORM_GRID = P(9, 5) # Number of ball positions (along the x and y axis) for which formation targets are precomputed
+FORM_SHIFT = P(0.35, 0.25) # Outfield players follow the ball by this fraction of its offset from the center
+FORM_GK_SHIFT = 0.15 # The keeper only follows the ball vertically (and stays between the posts)
 
 # Camera related
 DEF_FACTOR = 3
@@ -64,7 +93,39 @@ ZOOM_FACTOR = 5
 CAM_DEF = P(W//DEF_FACTOR, H//DEF_FACTOR) # default cameras range
 CAM_ZOOM = P(W//ZOOM_FACTOR, H//ZOOM_FACTOR) # zoomed cameras range
 OVER_SIZE = P(250,150)
-OVER_TOP_LEFT = P(W//2-OVER_SIZE.x//2, H-50-OVER_SIZE.y)
+OVER_TOP_LEFT = P(SCREEN_W//2-OVER_SIZE.x//2, SCREEN_H-50-OVER_SIZE.y)
+OVER_REFRESH = 2 # Redraw the overlay's players and ball every these many frames
+
+# Match related
+MATCH_LENGTH = 0 # Length of a match (in minutes of play at the default fps), 0 plays forever (the default)
+MATCH_HALVES = 2 # The players kick-off again at the start of every half
+MATCH_CLOCK = 90 # Minutes shown by the match clock at the final whistle
+FULL_TIME_WAIT = 10000 # Time (in ms) the final score is shown (unless a key is pressed)
+TURBO_DRAW_FPS = 30 # In turbo mode, frames shown per second (the game itself runs as fast as possible)
+
+# Network related
+NET_PORT = 4242 # Default port of the game server
+NET_TICK_RATE = 42 # Frames simulated per second by the server
+NET_KEYFRAME = 84 # Server sends a full snapshot every these many ticks (others only contain changes)
+NET_INTERP_TICKS = 2 # Clients render this many ticks behind the latest snapshot
+NET_MAX_BUFFER = 64*1024 # Clients (and spectators) with more unsent bytes than this are skipped until they catch up
+NET_CONNECT_TIMEOUT = 5 # Seconds a client waits for the server to accept it
+
+# Rollback related
+ROLLBACK_FRAMES = 8 # Maximum number of frames that can be re-simulated
+
+# Heatmap related
+HEATMAP_GRID = P(32, 20) # Number of cells along the x and y axis
+
+# Observation related
+OBS_SIZE = P(84, 84) # Width and height (in pixels) of the observations rendered for vision-based agents
+
+# Vectorized environment related
+VEC_ENV_FRAMES = 3000 # Frames in an episode (the match is then restarted)
+
+# Policy server related
+POLICY_HIDDEN = 64 # Number of hidden units of the (default) neural policy
+POLICY_MAX_LATENCY = 0.002 # Maximum time (in seconds) a decision request waits for others to batch it with
 ######################################
 
 
@@ -84,7 +145,7 @@ CONTROLS_IMG = os.path.join(IMG_DIR, 'controls.png')
 def GET_FORM_BG(team_id, formation_id): return os.path.join(
     IMG_DIR, 'formations', f'{team_id}-{formation_id}.jpg')  # Get correct formation img
 
-bsize = P(2*BALL_RADIUS, 2*BALL_RADIUS)
+bsize = P(2*BALL_RADIUS*DISPLAY_SCALE, 2*BALL_RADIUS*DISPLAY_SCALE)
 FOOTBALL_IMG = {
     'full': pygame.transform.scale(pygame.image.load(
         os.path.join(IMG_DIR, 'football.png')), bsize.val),
@@ -94,7 +155,7 @@ FOOTBALL_IMG = {
         os.path.join(IMG_DIR, 'football.png')), (P(ZOOM_FACTOR, ZOOM_FACTOR)*bsize).val),
 }
 
-psize = P(2*PLAYER_RADIUS, 2*PLAYER_RADIUS)
+psize = P(2*PLAYER_RADIUS*DISPLAY_SCALE, 2*PLAYER_RADIUS*DISPLAY_SCALE)
 RUN = {  # Sprites that animate the running player
     1: {
         'L': {i: {
@@ -139,4 +200,11 @@ CLICK = os.path.join(SOUND_DIR, 'click.wav')
 BOOING = os.path.join(SOUND_DIR, 'boo.wav')
 BOUNCE = os.path.join(SOUND_DIR, 'bounce2.wav')
 
+SOUND_CHANNELS = { # Number of (reserved) channels for each category of sound
+    'music': 1, 'crowd': 1, 'whistle': 2, 'goal': 1, 'boo': 1, 'kick': 2, 'bounce': 2,
+}
+SOUND_RATE_LIMIT = { # Minimum time (in ms) between two sounds of the same category
+    'kick': 100, 'bounce': 150, 'boo': 1000,
+}
+
 ######################################
@@ -0,0 +1,105 @@
+"""
+Stress mode i.e. N vs N matches on a proportionally bigger pitch (with generated formations)
+
+Measures how the cost of every part of a frame grows with the number of players:
+
+```python3 stress.py --players 11 50 100 200```
+
+The squad size is read from the ```FIFA_STRESS_N``` environment variable when ```settings``` is imported,
+so every size is measured in its own process. The time spent per frame is split into:
+
+- 'ai': deciding the actions of both teams (```Team.move_batch()```, player selection excluded)
+- 'selection': choosing the selected player of each team (```Team.select_player()```)
+- 'collision': pushing apart the players that overlap (```Game.collision()```)
+- 'ball': moving the ball and finding who touches it (```Ball.update()```)
+- 'refresh': updating the distance cache and the formations' targets (```Game.refresh()```)
+- 'render': drawing the whole game with the 'full' camera (```Game.draw()```, measured every ```--render_every``` frames)
+"""
+
+import json
+import os
+import subprocess
+import sys
+import time
+
+PARTS = ['ai', 'selection', 'collision', 'ball', 'refresh', 'render']
+
+
+def timed(times, part, func):
+    """
+    Wrap a function so that the time spent in it is added to ```times[part]```
+    """
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        times[part] += time.perf_counter() - start
+        return result
+    return wrapper
+
+
+def measure(frames, render_every, seed):
+    """
+    Play an AI vs AI match in this process (squad size from ```FIFA_STRESS_N```)
+
+    Returns the average time (in ms) per frame spent in each of ```PARTS```
+    """
+    from settings import NUM_TEAM, W, H, SCREEN_W, SCREEN_H, pygame, random
+    from game import Game
+    from teams.original_ai import OriginalAITeam
+
+    pygame.display.init()  # the mixer is not needed (no sounds)
+    pygame.font.init()
+    random.seed(seed)
+    win = pygame.Surface((SCREEN_W, SCREEN_H))
+    game = Game(OriginalAITeam(), OriginalAITeam(formation='balanced-1'), sound=False, cam='full')
+
+    times = dict.fromkeys(PARTS, 0)
+    for team in (game.team1, game.team2):
+        team.select_player = timed(times, 'selection', team.select_player)
+        team.move_batch = timed(times, 'ai', team.move_batch)
+    game.collision = timed(times, 'collision', game.collision)
+    game.ball.update = timed(times, 'ball', game.ball.update)
+    game.refresh = timed(times, 'refresh', game.refresh)
+
+    draws = 0
+    for frame in range(frames):
+        game.next()
+        if frame % render_every == 0:
+            start = time.perf_counter()
+            game.draw(win)
+            times['render'] += time.perf_counter() - start
+            draws += 1
+
+    times['ai'] -= times['selection']  # Selection happens inside move_batch()
+    result = {part: 1000*t/frames for part, t in times.items()}
+    result['render'] = 1000*times['render']/max(draws, 1)
+    result.update({'players': NUM_TEAM, 'pitch': f'{W}x{H}', 'goals': [game.stats.goals[1], game.stats.goals[2]]})
+    return result
+
+
+def run(players, frames, render_every, seed):
+    """
+    Measure every squad size (each in a new process) and print a table of the results
+    """
+    print(f'{"players":>8} {"pitch":>10} ' + ' '.join(f'{part:>9}' for part in PARTS) + f' {"total":>9}  (ms per frame)')
+    for n in players:
+        env = dict(os.environ, FIFA_STRESS_N=str(n))
+        env.setdefault('SDL_VIDEODRIVER', 'dummy')
+        env.setdefault('SDL_AUDIODRIVER', 'dummy')
+        out = subprocess.run([sys.executable, os.path.abspath(__file__), '--worker', '--frames', str(frames),
+                              '--render_every', str(render_every), '--seed', str(seed)],
+                             env=env, capture_output=True, text=True)
+        if out.returncode:
+            raise Exception(f'Stress run with {n} players failed:\n{out.stderr}')
+        result = json.loads(out.stdout.strip().splitlines()[-1])
+        print(f'{result["players"]:>8} {result["pitch"]:>10} ' + ' '.join(f'{result[part]:9.3f}' for part in PARTS) +
+              f' {sum(result[part] for part in PARTS):9.3f}')
+
+
+if __name__ == '__main__':
+    from args import get_stress_args
+    args = get_stress_args()
+    if args.worker:
+        print(json.dumps(measure(args.frames, args.render_every, args.seed)))
+    else:
+        run(args.players, args.frames, args.render_every, args.seed)
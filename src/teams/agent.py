@@ -5,7 +5,7 @@ Override the ```move``` method to create a valid custom agent
 """
 
 from settings import *
-from const import ACT
+from const import Action, ACT_IS_MOVE, ACT_VEL
 from abc import ABC, abstractmethod
 
 
@@ -29,6 +29,7 @@ class Agent(ABC):
         self.id = id  # Unique ID starts from 0 (also denotes it's position in team array)
         self.team_id = team_id  # ID of player's team
         self.pos = P(pos)  # Starting position
+        self.prev_pos = (self.pos.x, self.pos.y)  # Position at the start of the last frame (see ```Ball.contact()```)
         self.walk_dir = dir  # options are R (right), L (left)
         self.walk_count = 0  # For running animation
         self.rnd = 0.01*random.random() # random number used to break ties
@@ -60,12 +61,15 @@ class Agent(ABC):
                                              WALK_DELAY], (self.pos).val,
                 size=P(2*PLAYER_RADIUS, 2*PLAYER_RADIUS).val)
 
-    def update(self, action, players):
+    def update(self, action, players, dt=1):
         """
-        Update player's (in-game) state based on his action
+        Update player's (in-game) state based on his action (an ```Action```) held for ```dt``` frames
+
+        ```Action.NOTHING``` resets the running animation, so it only depends on the actions played
         """
-        if action in ['MOVE_U', 'MOVE_D', 'MOVE_L', 'MOVE_R']:
-            if action == 'MOVE_L':
+        self.prev_pos = (self.pos.x, self.pos.y)
+        if ACT_IS_MOVE[action]:
+            if action == Action.MOVE_L:
                 if self.walk_dir == 'R':
                     self.walk_count = 1
                     self.walk_dir = 'L'
@@ -74,7 +78,7 @@ class Agent(ABC):
                     if self.walk_count >= WALK_DELAY*ANIM_NUM:
                         self.walk_count = WALK_DELAY
 
-            elif action == 'MOVE_R':
+            elif action == Action.MOVE_R:
                 if self.walk_dir == 'L':
                     self.walk_count = 1
                     self.walk_dir = 'R'
@@ -87,9 +91,11 @@ class Agent(ABC):
                 if self.walk_count >= WALK_DELAY*ANIM_NUM:
                     self.walk_count = WALK_DELAY
 
-            self.pos += P(PLAYER_SPEED, PLAYER_SPEED)*P(ACT[action])
+            self.pos += ACT_VEL[action] if dt == 1 else P(dt, dt)*ACT_VEL[action]
             self.pos = P(min(max(PLAYER_RADIUS, self.pos.x), W - PLAYER_RADIUS), min(
                 max(PLAYER_RADIUS, self.pos.y), H - PLAYER_RADIUS))  # account for overflow
+        elif action == Action.NOTHING:
+            self.walk_count = 0  # Standing still (e.g. arrived at the formation position)
 
     @abstractmethod
     def move(self, state_prev, state, reward):
@@ -0,0 +1,47 @@
+"""
+Create an External team i.e. a team whose actions are set from outside the game (e.g. by a training loop)
+"""
+
+from settings import *
+from const import Action, ACT_DTYPE, FORM
+from teams.agent import Agent
+from teams.team import Team
+import numpy as np
+
+
+class ExternalAgent(Agent):
+    """
+    Agents that do not decide anything themselves (their team's ```actions``` are used instead)
+    """
+
+    def move(self, state_prev, state, reward):
+        return Action.NOTHING
+
+
+class ExternalTeam(Team):
+    """
+    A team that plays the actions written to its ```actions``` array
+
+    ```Action.FORM``` is allowed and sends the player back to his formation position
+    """
+
+    def set_players(self, ids):
+        self.players = []
+        for i in range(NUM_TEAM):
+            if i in ids:
+                self.players.append(ExternalAgent(
+                    id=i, team_id=self.id, pos=FORM[self.formation][self.dir][i]['coord']))
+        self.actions = np.zeros(len(self.players), dtype=ACT_DTYPE)  # Next actions (one for each player)
+
+    def move_batch(self, observation):
+        """
+        Return the actions set from outside (after resolving ```Action.FORM```)
+        """
+        actions = self.actions.copy()
+        form = np.flatnonzero(actions == Action.FORM).tolist()
+        if form:
+            actions[form] = self.formation_dirs(form)
+        return actions
+
+    def move(self, state_prev, state, reward):
+        return self.move_batch(None).tolist()
@@ -4,7 +4,7 @@ Create a Human team i.e. controlled by the keyboard
 
 from settings import *
 from math import sin,cos,pi
-from const import ACT, FORM
+from const import Action, FORM
 from teams.agent import Agent
 from teams.team import Team
 
@@ -34,31 +34,31 @@ class HumanAgent(Agent):
         keys = pygame.key.get_pressed()
 
         if keys[pygame.K_a]:
-            return 'SHOOT_A'
+            return Action.SHOOT_A
         elif keys[pygame.K_d]:
-            return 'SHOOT_D'
+            return Action.SHOOT_D
         elif keys[pygame.K_w]:
-            return 'SHOOT_W'
+            return Action.SHOOT_W
         elif keys[pygame.K_x]:
-            return 'SHOOT_X'
+            return Action.SHOOT_X
         elif keys[pygame.K_q]:
-            return 'SHOOT_Q'
+            return Action.SHOOT_Q
         elif keys[pygame.K_c]:
-            return 'SHOOT_C'
+            return Action.SHOOT_C
         elif keys[pygame.K_e]:
-            return 'SHOOT_E'
+            return Action.SHOOT_E
         elif keys[pygame.K_z]:
-            return 'SHOOT_Z'
+            return Action.SHOOT_Z
         elif keys[pygame.K_LEFT]:
-            return 'MOVE_L'
+            return Action.MOVE_L
         elif keys[pygame.K_RIGHT]:
-            return 'MOVE_R'
+            return Action.MOVE_R
         elif keys[pygame.K_UP]:
-            return 'MOVE_U'
+            return Action.MOVE_U
         elif keys[pygame.K_DOWN]:
-            return 'MOVE_D'
+            return Action.MOVE_D
         else:
-            return 'NOTHING'
+            return Action.NOTHING
 
 
 class HumanTeam(Team):
@@ -75,12 +75,12 @@ class HumanTeam(Team):
 
         self.selected = NUM_TEAM//2
 
-    def update(self, action, ball):
+    def update(self, action, ball, dt=1):
         """
         Select a player (based on the Ball's state) and update the team's state based on the received actions and the ball's position
         """
         self.select_player(ball)
-        super().update(action, ball)
+        super().update(action, ball, dt)
 
     def draw(self, win, cam, debug):
         """
@@ -90,62 +90,6 @@ class HumanTeam(Team):
             player.draw(win, cam, self.id, selected=(
                 i == self.selected), debug=debug)
 
-    def select_player(self, ball):
-        """
-        Select the player that is controlled by the keyboard
-
-        **Working**:
-
-        - If ball is near the D-area, keeper gets automatic control
-        - Otherwise the player nearest to the ball has control (ties are broken randomly)
-        """
-        dists = [player.pos.dist(ball.pos) +
-                 player.rnd for player in self.players]
-        # Default - Ball goes to nearest player
-        self.selected = dists.index(min(dists))
-
-        if min(dists) > PLAYER_RADIUS + BALL_RADIUS and abs(ball.pos.x - self.goal_x) < W//5:
-            # If the ball is within the D and is not very near to any other player, give control to the keeper
-            self.selected = 0
-
-    def formation_dir(self, id):
-        """
-        Send player (with the given ID) to his designated place in the formation
-
-        **Working**:
-
-        - If player is in-line (horizontally or vertically), move directly towards original point (U/L/D/R)
-        - Otherwise choose 2 directions that take you closer to the original point and choose one of them randomly (UL/UR/DL/DR)
-        """
-        player = self.players[id]
-        min_dist = 2
-
-        if abs(player.pos.x - FORM[self.formation][self.dir][id]['coord'].x) <= min_dist and abs(player.pos.y - FORM[self.formation][self.dir][id]['coord'].y) <= min_dist:
-            player.walk_count = 0
-            return 'NOTHING'
-        elif abs(player.pos.x - FORM[self.formation][self.dir][id]['coord'].x) <= min_dist:
-            if (player.pos.y - FORM[self.formation][self.dir][id]['coord'].y) > min_dist:
-                return 'MOVE_U'
-            else:
-                return 'MOVE_D'
-        elif abs(player.pos.y - FORM[self.formation][self.dir][id]['coord'].y) <= min_dist:
-            if (player.pos.x - FORM[self.formation][self.dir][id]['coord'].x) > min_dist:
-                return 'MOVE_L'
-            else:
-                return 'MOVE_R'
-        elif (player.pos.x - FORM[self.formation][self.dir][id]['coord'].x) > min_dist:
-            if (player.pos.y - FORM[self.formation][self.dir][id]['coord'].y) > min_dist:
-                return random.choice(['MOVE_L', 'MOVE_U'])
-            else:
-                return random.choice(['MOVE_L', 'MOVE_D'])
-        elif (player.pos.x - FORM[self.formation][self.dir][id]['coord'].x) < - min_dist:
-            if (player.pos.y - FORM[self.formation][self.dir][id]['coord'].y) > min_dist:
-                return random.choice(['MOVE_R', 'MOVE_U'])
-            else:
-                return random.choice(['MOVE_R', 'MOVE_D'])
-        else:
-            return 'NOTHING'
-
     def move(self, state_prev, state, reward):
         """
         Move a human team
@@ -156,12 +100,16 @@ class HumanTeam(Team):
         - All other players return to their original positions (if maintain_formation is set)
         """
         actions = []
+        form = []
         for i, player in enumerate(self.players):
             if i == self.selected:
                 actions.append(player.move(state_prev, state, reward))
             elif self.maintain_formation:
-                actions.append(self.formation_dir(i))
+                actions.append(Action.FORM)
+                form.append(i)
             else:
-                player.walk_count = 0
-                actions.append('NOTHING')
+                actions.append(Action.NOTHING)
+
+        for i, move in zip(form, self.formation_dirs(form)):
+            actions[i] = move
         return actions
@@ -3,7 +3,7 @@ Create a hardcoded AI team i.e. actions are determined using simple geometry
 """
 
 from settings import *
-from const import ACT, FORM
+from const import Action, ACT_DIR, FORM
 from teams.agent import Agent
 from teams.team import Team
 
@@ -42,15 +42,16 @@ class OriginalAIAgent(Agent):
         """
         return abs(line[0]*pt.x + line[1]*pt.y + line[2])/math.sqrt(line[0]**2 + line[1]**2)
 
-    def ai_move_with_ball(self, enemy_players, goal_x):
+    def ai_move_with_ball(self, enemy_players, goal_x, dists=None):
         """
         How AI players move when they have the ball
 
         Attributes:
             enemy_players (list): A list of the positions (coordinates) of the enemy players
             goal_x (int): The x-coordinate of the enemy's goal post
+            dists (Distances): The game's distance cache (distances are recomputed if not given)
 
-        Returns an ACT
+        Returns an ```Action```
 
         **Working**:
 
@@ -61,8 +62,12 @@ class OriginalAIAgent(Agent):
         """
 
         player_vec = P(0, 0)  # Direction vector to move due to opposite team
-        for player in enemy_players:
-            if self.pos.dist(player.pos) < AI_NEAR_RADIUS(self.difficulty):
+        if dists is not None:
+            enemy_dists = dists.to_team(self.team_id, self.id, 2 if self.team_id == 1 else 1)
+        else:
+            enemy_dists = [self.pos.dist(player.pos) for player in enemy_players]
+        for player, dist in zip(enemy_players, enemy_dists):
+            if dist < AI_NEAR_RADIUS(self.difficulty):
                 dir = player.pos - self.pos
                 # magnitude of vector is proportional to inverse of distance
                 mag = (AI_NEAR_RADIUS(self.difficulty)*PLAYER_RADIUS/dir.mag)**2
@@ -76,8 +81,8 @@ class OriginalAIAgent(Agent):
 
         dir_final = final_vec * P(1/final_vec.mag, 1/final_vec.mag)
 
-        possible_dir = ['NOTHING', 'MOVE_U', 'MOVE_D', 'MOVE_L', 'MOVE_R']
-        dist_to_dir = [dir_final.dist(ACT[dir]) for dir in possible_dir]
+        possible_dir = [Action.NOTHING, Action.MOVE_U, Action.MOVE_D, Action.MOVE_L, Action.MOVE_R]
+        dist_to_dir = [dir_final.dist(ACT_DIR[dir]) for dir in possible_dir]
         prob_dist = [math.exp(1/d) if d >= 0.1 else math.exp(10)
                      for d in dist_to_dir]
         chosen_dir = random.choices(possible_dir, weights=[
@@ -85,33 +90,36 @@ class OriginalAIAgent(Agent):
 
         return chosen_dir
 
-    def ai_move_without_ball(self, ball):
+    def ai_move_without_ball(self, ball, dist=None):
         """
         How AI players move when they do not have the ball
 
         Attributes:
             ball (Point): position of the ball
+            dist (float): distance to the ball (from the game's distance cache, computed if not given)
 
-        Returns an ACT
+        Returns an ```Action```
 
         **Working**:
 
         - If the ball is within its ```AI_FAR_RADIUS```, move towards the ball (probabilistically)
         - Otherwise, do ```NOTHING```
         """
-        if self.pos.dist(ball.pos) < AI_FAR_RADIUS(self.difficulty):
+        if dist is None:
+            dist = self.pos.dist(ball.pos)
+        if dist < AI_FAR_RADIUS(self.difficulty):
             vec = ball.pos - self.pos
             vec_dir = P(1/vec.mag, 1/vec.mag)*vec
 
-            possible_dir = ['MOVE_U', 'MOVE_D', 'MOVE_L', 'MOVE_R']
-            dist_to_dir = [vec_dir.dist(ACT[dir]) for dir in possible_dir]
+            possible_dir = [Action.MOVE_U, Action.MOVE_D, Action.MOVE_L, Action.MOVE_R]
+            dist_to_dir = [vec_dir.dist(ACT_DIR[dir]) for dir in possible_dir]
             prob_dist = [math.exp(1/d) if d >= 0.1 else math.exp(10)
                          for d in dist_to_dir]
             chosen_dir = random.choices(possible_dir, weights=[
                                         prob/sum(prob_dist) for prob in prob_dist])[0]
             return chosen_dir
         else:
-            return 'NOTHING'
+            return Action.NOTHING
 
     def ai_pass(self, team_players, enemy_team_players):
         """
@@ -121,7 +129,7 @@ class OriginalAIAgent(Agent):
             team_players (list): A list of the positions (coordinates) of the team players
             enemy_team_players (list): A list of the positions (coordinates) of the enemy team players
 
-        Returns an ACT
+        Returns an ```Action```
 
         **Working**:
 
@@ -138,14 +146,14 @@ class OriginalAIAgent(Agent):
         self_pos = P(self.pos.x, H-self.pos.y)
 
         prefs = {  # directions are wrt origin at bottom-right
-            'SHOOT_A': {'priority': {1: 4, 2: 1}, 'angle': math.pi, 'dir': P(-1, 0)},
-            'SHOOT_Q': {'priority': {1: 3, 2: 1}, 'angle': math.pi*3/4, 'dir': P(-1, 1)},
-            'SHOOT_Z': {'priority': {1: 3, 2: 1}, 'angle': -math.pi*3/4, 'dir': P(-1, -1)},
-            'SHOOT_W': {'priority': {1: 2, 2: 2}, 'angle': math.pi/2, 'dir': P(0, 1)},
-            'SHOOT_X': {'priority': {1: 2, 2: 2}, 'angle': -math.pi/2, 'dir': P(0, -1)},
-            'SHOOT_E': {'priority': {1: 1, 2: 3}, 'angle': math.pi/4, 'dir': P(1, 1)},
-            'SHOOT_C': {'priority': {1: 1, 2: 3}, 'angle': -math.pi/4, 'dir': P(1, -1)},
-            'SHOOT_D': {'priority': {1: 1, 2: 4}, 'angle': 0, 'dir': P(1, 0)},
+            Action.SHOOT_A: {'priority': {1: 4, 2: 1}, 'angle': math.pi, 'dir': P(-1, 0)},
+            Action.SHOOT_Q: {'priority': {1: 3, 2: 1}, 'angle': math.pi*3/4, 'dir': P(-1, 1)},
+            Action.SHOOT_Z: {'priority': {1: 3, 2: 1}, 'angle': -math.pi*3/4, 'dir': P(-1, -1)},
+            Action.SHOOT_W: {'priority': {1: 2, 2: 2}, 'angle': math.pi/2, 'dir': P(0, 1)},
+            Action.SHOOT_X: {'priority': {1: 2, 2: 2}, 'angle': -math.pi/2, 'dir': P(0, -1)},
+            Action.SHOOT_E: {'priority': {1: 1, 2: 3}, 'angle': math.pi/4, 'dir': P(1, 1)},
+            Action.SHOOT_C: {'priority': {1: 1, 2: 3}, 'angle': -math.pi/4, 'dir': P(1, -1)},
+            Action.SHOOT_D: {'priority': {1: 1, 2: 4}, 'angle': 0, 'dir': P(1, 0)},
         }
 
         possible_passes = []
@@ -157,6 +165,7 @@ class OriginalAIAgent(Agent):
                 self_pos.y*math.cos(v['angle']) - self_pos.x * \
                 math.sin(v['angle']),  # constant
             ]
+            enemy_dist = None  # The enemy nearest to the line only depends on the line (found once per direction)
             for player in team_players:
                 if player.id != self.id:
                     team_dist = self.dist_to_line(line, team_pos[player.id])
@@ -166,13 +175,14 @@ class OriginalAIAgent(Agent):
                             (self_pos.y - team_pos[player.id].y)*v['dir'].y <= 0):  # In correct y-direction
 
                         # Consider enemy's distance as well
-                        enemy_dist = math.inf
-                        enemy_min_pos = P(0, 0)
-                        for enemy_player in enemy_team_players:  # Check for all enemies
-                            if self.dist_to_line(line, enemy_team_pos[enemy_player.id]) < enemy_dist:
-                                enemy_dist = self.dist_to_line(
-                                    line, enemy_team_pos[enemy_player.id])
-                                enemy_min_pos = enemy_team_pos[enemy_player.id]
+                        if enemy_dist is None:
+                            enemy_dist = math.inf
+                            enemy_min_pos = P(0, 0)
+                            for enemy_player in enemy_team_players:  # Check for all enemies
+                                dist = self.dist_to_line(line, enemy_team_pos[enemy_player.id])
+                                if dist < enemy_dist:
+                                    enemy_dist = dist
+                                    enemy_min_pos = enemy_team_pos[enemy_player.id]
 
                         if (enemy_dist < team_dist and  # enemy is nearer than team player
                             # In correct x-direction (not behind the line)
@@ -192,7 +202,7 @@ class OriginalAIAgent(Agent):
         if possible_passes != []:
             ai_pass = sorted(possible_passes)[0][2]
         else:
-            ai_pass = 'NOTHING'
+            ai_pass = Action.NOTHING
 
         return ai_pass
 
@@ -201,10 +211,10 @@ class OriginalAIAgent(Agent):
         How AI players shoot the ball
 
         Attributes:
-            gk (Agent): The enemy's goalkeeper agent
+            gk (Agent): The enemy's goalkeeper agent (None if the enemy has no keeper)
             goal_x (int): the x-coordinate of the enemy's
 
-        Returns an ACT
+        Returns an ```Action```
 
         **Working**:
 
@@ -215,19 +225,19 @@ class OriginalAIAgent(Agent):
 
         angles = {
             1: {  # For team 1
-                'SHOOT_E': math.pi/4,
-                'SHOOT_D': 0,
-                'SHOOT_C': -math.pi/4,
+                Action.SHOOT_E: math.pi/4,
+                Action.SHOOT_D: 0,
+                Action.SHOOT_C: -math.pi/4,
             },
             2: {  # For team 2
-                'SHOOT_Q': math.pi*3/4,
-                'SHOOT_A': math.pi,
-                'SHOOT_Z': -math.pi*5/4,
+                Action.SHOOT_Q: math.pi*3/4,
+                Action.SHOOT_A: math.pi,
+                Action.SHOOT_Z: -math.pi*5/4,
             },
         }
 
         self_pos = P(self.pos.x, H-self.pos.y)
-        gk_pos = P(gk.pos.x, H-gk.pos.y)
+        gk_pos = P(gk.pos.x, H-gk.pos.y) if gk is not None else P(goal_x, H//2)  # aim at the posts without a keeper
 
         possible_shots = []
         for k, v in angles[self.team_id].items():
@@ -243,7 +253,7 @@ class OriginalAIAgent(Agent):
         if possible_shots:
             shot = sorted(possible_shots)[0][1]
         else:
-            shot = 'NOTHING'
+            shot = Action.NOTHING
 
         return shot
 
@@ -255,7 +265,7 @@ class OriginalAIAgent(Agent):
             goal_x (int): the x-coordinate of the enemy's
             ball (Ball): The football object
 
-        Returns an ACT
+        Returns an ```Action```
 
         **Working**:
 
@@ -267,16 +277,16 @@ class OriginalAIAgent(Agent):
             # Goal keeper does not go into the goal himself
             if abs(self.pos.x - goal_x) > BALL_RADIUS + PLAYER_RADIUS:
                 if ball.pos.y == self.pos.y:  # Do nothing if ball is directly in your path
-                    return 'NOTHING'
+                    return Action.NOTHING
                 elif PLAYER_RADIUS and GOAL_POS[0]*H < self.pos.y < GOAL_POS[1]*H:
                     if ball.pos.y - self.pos.y >= 0:
-                        return 'MOVE_D'
+                        return Action.MOVE_D
                     else:
-                        return 'MOVE_U'
+                        return Action.MOVE_U
                 else:
-                    return 'FORM'  # IMM_PASS
+                    return Action.FORM  # IMM_PASS
         else:
-            return 'FORM'
+            return Action.FORM
 
     def gk_pass(self, enemy_players, goal_x):
         """
@@ -286,7 +296,7 @@ class OriginalAIAgent(Agent):
             enemy_players (list): A list of the positions (coordinates) of the enemy players
             goal_x (int): The x-coordinate of the team's goal post
 
-        Returns an ACT
+        Returns an ```Action```
 
         **Working**:
 
@@ -295,14 +305,14 @@ class OriginalAIAgent(Agent):
 
         angles = {
             1: {  # For team 1
-                'SHOOT_E': math.pi/4,
-                'SHOOT_D': 0,
-                'SHOOT_C': -math.pi/4,
+                Action.SHOOT_E: math.pi/4,
+                Action.SHOOT_D: 0,
+                Action.SHOOT_C: -math.pi/4,
             },
             2: {  # For team 2
-                'SHOOT_Q': math.pi*3/4,
-                'SHOOT_A': math.pi,
-                'SHOOT_Z': -math.pi*5/4,
+                Action.SHOOT_Q: math.pi*3/4,
+                Action.SHOOT_A: math.pi,
+                Action.SHOOT_Z: -math.pi*5/4,
             },
         }
 
@@ -321,7 +331,7 @@ class OriginalAIAgent(Agent):
             ]
             if near_enemy_pos:
                 dist = math.inf
-                dir = 'NOTHING'
+                dir = Action.NOTHING
                 dist = min([self.dist_to_line(line, pos)
                             for pos in near_enemy_pos])
                 possible_passes.append((-dist, k))
@@ -329,7 +339,7 @@ class OriginalAIAgent(Agent):
         if possible_passes:
             shot = sorted(possible_passes)[0][1]
         else:
-            shot = 'NOTHING'
+            shot = Action.NOTHING
 
         return shot
 
@@ -337,7 +347,7 @@ class OriginalAIAgent(Agent):
         """
         Umbrella function that is used to move the player. Overrides the Agent's ```move()``` method
 
-        Returns an ACT
+        Returns an ```Action```
 
         **Working**:
 
@@ -358,42 +368,45 @@ class OriginalAIAgent(Agent):
 
         if state:
             if self.id == 0:  # Special for the goal-keeper
-                ai_gk_pass = self.gk_pass(
-                    other_team['players'], self_team['goal_x'])
                 ai_gk_move = self.gk_move(self_team['goal_x'], state['ball'])
                 # GK has the ball
                 if selected == self.id and state['ball'].ball_stats['player'] == self.id:
-                    if ai_gk_pass != 'NOTHING':
+                    ai_gk_pass = self.gk_pass(
+                        other_team['players'], self_team['goal_x'])  # only computed when needed
+                    if ai_gk_pass != Action.NOTHING:
                         return ai_gk_pass
                     else:
                         return ai_gk_move
                 else:
                     return ai_gk_move
 
-            # Selected player has the ball
+            # Selected player has the ball (shots and passes are only computed when needed)
             if selected == self.id and state['ball'].ball_stats['player'] == self.id:
-                ai_shoot = self.ai_shoot(
-                    other_team['players'][0], other_team['goal_x'])
-                ai_pass = self.ai_pass(
-                    self_team['players'], other_team['players'])
                 # If shot is possible, take it
-                if self.pos.dist(P(other_team['goal_x'], H//2)) <= AI_SHOOT_RADIUS and ai_shoot != 'NOTHING':
-                    return ai_shoot
+                if self.pos.dist(P(other_team['goal_x'], H//2)) <= AI_SHOOT_RADIUS:
+                    enemy_gk = next((player for player in other_team['players'] if player.id == 0), None)
+                    ai_shoot = self.ai_shoot(enemy_gk, other_team['goal_x'])
+                    if ai_shoot != Action.NOTHING:
+                        return ai_shoot
                 # Else, pass if possible (passes towards the enemy goal are prioritized)
-                elif ai_pass != 'NOTHING' and random.random() >= AI_PASS_PROB:
+                ai_pass = self.ai_pass(
+                    self_team['players'], other_team['players'])
+                if ai_pass != Action.NOTHING and random.random() >= AI_PASS_PROB:
                     return ai_pass
                 else:
                     # Move towards the goal
-                    return self.ai_move_with_ball(other_team['players'], other_team['goal_x'])
+                    return self.ai_move_with_ball(other_team['players'], other_team['goal_x'], state.get('dists'))
 
             else:  # Move towards the ball if posssbile, otherwise return to formation
-                move = self.ai_move_without_ball(state['ball'])
-                if move != 'NOTHING':
+                dists = state.get('dists')
+                move = self.ai_move_without_ball(
+                    state['ball'], dists.to_ball(self.team_id, self.id) if dists else None)
+                if move != Action.NOTHING:
                     return move
                 else:
-                    return 'FORM'  # Special action, not defined in ACT
+                    return Action.FORM  # Special action, resolved by ```Team.formation_dirs()```
         else:
-            return 'NOTHING'  # Otherwise do nothing
+            return Action.NOTHING  # Otherwise do nothing
 
 
 class OriginalAITeam(Team):
@@ -407,77 +420,58 @@ class OriginalAITeam(Team):
             if i in ids:
                 self.players.append(OriginalAIAgent(
                     id=i, team_id=self.id, pos=FORM[self.formation][self.dir][i]['coord'], diff=self.difficulty))
+        self.reset_schedule()
 
-    def select_player(self, ball):
+    def reset_schedule(self):
         """
-        Select a player based on the balls position
-
-        **Working**:
-
-        - If ball is near the D-area, keeper gets automatic control
-        - Otherwise the player nearest to the ball has control (ties are broken randomly)
+        Forget the actions remembered by the scheduler (see ```move()```)
         """
+        self.last_move = [None]*len(self.players)
+        self.frame = 0
 
-        dists = [player.pos.dist(ball.pos) +
-                 player.rnd for player in self.players]
-        # Default - Ball goes to nearest player
-        self.selected = dists.index(min(dists))
-
-        if min(dists) > PLAYER_RADIUS + BALL_RADIUS and abs(ball.pos.x - self.goal_x) < W//5:
-            # If the ball is within the D and is not very near to any other player, give control to the keeper
-            self.selected = 0
-
-    def formation_dir(self, id):
+    def player_move(self, player, state_prev, state, reward):
         """
-        Send player (with the given ID) to his designated place in the formation
-
-        **Working**:
-
-        - If player is in-line (horizontally or vertically), move directly towards original point (U/L/D/R)
-        - Otherwise choose 2 directions that take you closer to the original point and choose one of them randomly (UL/UR/DL/DR)
+        Let a single player decide its move (may return ```Action.FORM```)
         """
-        player = self.players[id]
-        min_dist = 2
-
-        if abs(player.pos.x - FORM[self.formation][self.dir][id]['coord'].x) <= min_dist and abs(player.pos.y - FORM[self.formation][self.dir][id]['coord'].y) <= min_dist:
-            player.walk_count = 0
-            return 'NOTHING'
-        elif abs(player.pos.x - FORM[self.formation][self.dir][id]['coord'].x) <= min_dist:
-            if (player.pos.y - FORM[self.formation][self.dir][id]['coord'].y) > min_dist:
-                return 'MOVE_U'
-            else:
-                return 'MOVE_D'
-        elif abs(player.pos.y - FORM[self.formation][self.dir][id]['coord'].y) <= min_dist:
-            if (player.pos.x - FORM[self.formation][self.dir][id]['coord'].x) > min_dist:
-                return 'MOVE_L'
-            else:
-                return 'MOVE_R'
-        elif (player.pos.x - FORM[self.formation][self.dir][id]['coord'].x) > min_dist:
-            if (player.pos.y - FORM[self.formation][self.dir][id]['coord'].y) > min_dist:
-                return random.choices(['MOVE_L', 'MOVE_U'])[0]
-            else:
-                return random.choices(['MOVE_L', 'MOVE_D'])[0]
-        elif (player.pos.x - FORM[self.formation][self.dir][id]['coord'].x) < - min_dist:
-            if (player.pos.y - FORM[self.formation][self.dir][id]['coord'].y) > min_dist:
-                return random.choices(['MOVE_R', 'MOVE_U'])[0]
-            else:
-                return random.choices(['MOVE_R', 'MOVE_D'])[0]
-        else:
-            return 'NOTHING'
+        return player.move(state_prev, state, reward, self.selected_id)
 
     def move(self, state_prev, state, reward):
         """
         Move each player in the team. Call this method to move the team
+
+        **Scheduling**:
+
+        - The selected player, the goalkeeper and players that could reach the ball soon decide every frame
+        - Other players decide once every ```AI_SCHED_EVERY``` frames (round-robin) and repeat their last move in between
+        - At most ```AI_SCHED_MAX``` of those are updated in a frame, when more are due the ones updated
+          take turns (so that the same players are not always left out)
         """
+        self.frame += 1
+
         actions = []
         if state:
             self.select_player(state['ball'])
+            if self.dists is not None:
+                ball_dists = self.dists.ball[self.id]
+            else:
+                ball_dists = [player.pos.dist(state['ball'].pos) for player in self.players]
+            near = AI_FAR_RADIUS(self.difficulty) + (BALL_SPEED + PLAYER_SPEED)*AI_SCHED_EVERY
         else:
             self.selected = NUM_TEAM//2
+        urgent = [not state or i == self.selected or player.id == 0 or self.last_move[i] is None or
+                  ball_dists[i] < near for i, player in enumerate(self.players)]
+        due = [i for i in range(len(self.players)) if not urgent[i] and (self.frame + i) % AI_SCHED_EVERY == 0]
+        if len(due) > AI_SCHED_MAX:
+            turn = (self.frame//AI_SCHED_EVERY*AI_SCHED_MAX) % len(due)
+            due = (due + due)[turn:turn + AI_SCHED_MAX]
+        due = set(due)
         for i, player in enumerate(self.players):
-            move = player.move(state_prev, state, reward, self.selected)
-            if move != 'FORM':
-                actions.append(move)
-            else:
-                actions.append(self.formation_dir(i))
+            if urgent[i] or i in due:
+                self.last_move[i] = self.player_move(player, state_prev, state, reward)
+
+            actions.append(self.last_move[i])
+
+        form = [i for i, move in enumerate(actions) if move == Action.FORM]
+        for i, move in zip(form, self.formation_dirs(form)):
+            actions[i] = move
         return actions
@@ -0,0 +1,192 @@
+"""
+Create an AI team that plans its passes and shots i.e. actions are chosen by simulating the ball a few frames ahead
+"""
+
+from settings import *
+from const import Action, ACT_DIR, ACT_IS_SHOT, FORM
+from teams.original_ai import OriginalAIAgent, OriginalAITeam
+
+SHOTS = [a for a in Action if ACT_IS_SHOT[a]]
+
+
+def rollout(bx, by, vx, vy, dir, shooter, team, enemy, goal_x, frames):
+    """
+    Simulate a shot (a stripped down copy of ```Ball.update```, ```check_capture``` and ```goal_check```)
+
+    Attributes:
+        bx, by (float): position of the ball when the shot is taken
+        vx, vy (float): direction of the shot (see ```ACT_DIR```)
+        dir (str): Direction the shooter is facing ('L' or 'R')
+        shooter (int): ID of the player taking the shot (can not receive it)
+        team (list): (id, x, y) of the shooter's team
+        enemy (list): (id, x, y) of the enemy team
+        goal_x (int): x-coordinate of the enemy's goal
+        frames (int): Number of frames to simulate
+
+    Players are not moved, instead each of them can reach ```PLAYER_SPEED``` pixels further every frame
+
+    Returns (outcome, x) where outcome is one of 'goal', 'own_goal', 'out', 'team', 'enemy', 'free'
+    and x is the x-coordinate of the ball at the end
+    """
+    # Ball release mechanics (see Ball.update)
+    const = PLAYER_RADIUS + BALL_RADIUS + 1
+    if dir == 'R':
+        bx += const - BALL_RADIUS*BALL_OFFSET.x if vx >= 0 else -(const + BALL_RADIUS*BALL_OFFSET.x)
+    else:
+        bx += const + BALL_RADIUS*BALL_OFFSET.x if vx > 0 else -(const - BALL_RADIUS*BALL_OFFSET.x)
+
+    reach = PLAYER_RADIUS + BALL_RADIUS
+    for t in range(frames):
+        if t:
+            bx += BALL_SPEED*vx
+            by += BALL_SPEED*vy
+            if not (BALL_RADIUS <= by <= H - BALL_RADIUS):
+                by = min(max(BALL_RADIUS, by), H - BALL_RADIUS)
+                vy = -vy
+            if not (BALL_RADIUS < bx < W - BALL_RADIUS):
+                if GOAL_POS[0]*H < by < GOAL_POS[1]*H:
+                    return ('goal' if abs(bx - goal_x) < W//2 else 'own_goal'), bx
+                return 'out', bx
+
+        r = reach + PLAYER_SPEED*t
+        r2 = r*r
+        for id, x, y in enemy: # enemies first (pessimistic when both arrive together)
+            if (x-bx)*(x-bx) + (y-by)*(y-by) < r2:
+                return 'enemy', bx
+        for id, x, y in team:
+            if id != shooter and (x-bx)*(x-bx) + (y-by)*(y-by) < r2:
+                return 'team', bx
+
+    return 'free', bx
+
+
+class PlanningAIAgent(OriginalAIAgent):
+    """
+    AI agent that chooses between keeping the ball, passing and shooting by simulating each shot
+    """
+
+    def __init__(self, id, team_id, pos, dir='L', diff=0.6):
+        super().__init__(id, team_id, pos, dir, diff)
+        self.noise = None  # How much this agent misjudges each shot (drawn once per possession, see ```plan()```)
+
+    def value(self, outcome, x, goal_x):
+        """
+        How good an outcome is for this agent's team (between -1 and 1)
+        """
+        progress = 1 - abs(x - goal_x)/W  # 0 at the own goal, 1 at the enemy goal
+        return {
+            'goal': 1,
+            'own_goal': -1,
+            'out': -0.3,
+            'enemy': -0.6,
+            'team': 0.1 + 0.5*progress,
+            'free': -0.1 + 0.3*progress,
+        }[outcome]
+
+    def plan(self, team, enemy_players, goal_x):
+        """
+        Return the best shot (or ```Action.NOTHING``` if keeping the ball is better)
+
+        Rollouts are cached (per ball cell) for ```PLAN_CACHE_FRAMES``` frames and new ones
+        are only computed while the team has rollouts left for this frame (see ```PLAN_ROLLOUTS```)
+
+        Easier AIs misjudge their options: a random error is added to the value of each shot that beats keeping the ball
+        before choosing between them. It is drawn when the agent gets the ball and kept until he loses it
+        (so that he sticks to his choice)
+        """
+        frames = round(PLAN_FRAMES*(0.5 + self.difficulty))
+        if self.noise is None:
+            sigma = 0.3*(1 - self.difficulty)
+            self.noise = {a: random.gauss(0, sigma) if sigma else 0 for a in SHOTS}
+        cell = (int(self.pos.x//PLAN_CACHE_CELL), int(self.pos.y//PLAN_CACHE_CELL))
+
+        mates = [(player.id, player.pos.x, player.pos.y) for player in team.players]
+        enemy = [(player.id, player.pos.x, player.pos.y) for player in enemy_players]
+        bx, by = team.ball_pos
+
+        keep = 0.05 + 0.3*(1 - abs(self.pos.x - goal_x)/W)  # value of keeping the ball
+        best, best_val = Action.NOTHING, -math.inf
+        for a in SHOTS:
+            key = (self.id, a, cell)
+            cached = team.cache.get(key)
+            if cached is not None and 0 <= team.frame - cached[0] <= PLAN_CACHE_FRAMES:
+                val = cached[1]
+            elif team.rollouts > 0:
+                team.rollouts -= 1
+                outcome, x = rollout(bx, by, ACT_DIR[a].x, ACT_DIR[a].y, self.walk_dir, self.id,
+                                     mates, enemy, goal_x, frames)
+                val = self.value(outcome, x, goal_x)
+                team.cache[key] = (team.frame, val)
+            else:
+                continue
+
+            if val > keep and val + self.noise[a] > best_val:  # Only shots that beat keeping the ball
+                best, best_val = a, val + self.noise[a]
+        return best
+
+    def move(self, state_prev, state, reward, selected, team=None):
+        """
+        Same as the ```OriginalAIAgent``` except when an outfield player has the ball
+
+        Then it shoots / passes if a simulated shot beats keeping the ball, otherwise it moves with the ball
+        """
+        if (state and team is not None and self.id != 0 and selected == self.id
+                and state['ball'].ball_stats['player'] == self.id):
+            other_team = state['team2'] if self.team_id == 1 else state['team1']
+            shot = self.plan(team, other_team['players'], other_team['goal_x'])
+            if shot != Action.NOTHING:
+                return shot
+            return self.ai_move_with_ball(other_team['players'], other_team['goal_x'], state.get('dists'))
+        else:
+            self.noise = None  # Lost (or passed) the ball
+        return super().move(state_prev, state, reward, selected)
+
+
+class PlanningAITeam(OriginalAITeam):
+    """
+    AI team whose ball carrier plans its passes and shots
+    """
+
+    def set_players(self, ids):
+        self.players = []
+        for i in range(NUM_TEAM):
+            if i in ids:
+                self.players.append(PlanningAIAgent(
+                    id=i, team_id=self.id, pos=FORM[self.formation][self.dir][i]['coord'], diff=self.difficulty))
+        self.reset_schedule()
+
+    def reset_schedule(self):
+        """
+        Forget the scheduled moves and the cached rollouts (their frames are counted from the scheduler's frame)
+        """
+        super().reset_schedule()
+        self.cache = {}
+
+    def save_plan(self):
+        """
+        Copy of the planning state i.e. the cached rollouts and each player's noise (saved by ```GameState```)
+        """
+        return dict(self.cache), {player.id: player.noise for player in self.players}  # noise dicts are never modified
+
+    def load_plan(self, plan):
+        """
+        Restore a planning state returned by ```save_plan()```
+        """
+        cache, noise = plan
+        self.cache = dict(cache)
+        for player in self.players:
+            player.noise = noise[player.id]
+
+    def player_move(self, player, state_prev, state, reward):
+        return player.move(state_prev, state, reward, self.selected_id, team=self)
+
+    def move(self, state_prev, state, reward):
+        """
+        Move each player in the team. Call this method to move the team
+        """
+        self.rollouts = PLAN_ROLLOUTS
+        if self.frame % PLAN_CACHE_FRAMES == 0:
+            self.cache = {k: v for k, v in self.cache.items() if 0 <= self.frame - v[0] <= PLAN_CACHE_FRAMES}
+        if state:
+            self.ball_pos = (state['ball'].pos.x, state['ball'].pos.y)
+        return super().move(state_prev, state, reward)
@@ -0,0 +1,38 @@
+"""
+Create a Policy team i.e. a team whose actions are decided by a (shared) policy server
+"""
+
+from settings import *
+from teams.external import ExternalTeam
+
+
+class PolicyTeam(ExternalTeam):
+    """
+    A team that asks a ```PolicyServer``` for its actions (decisions of many matches are batched together)
+
+    Matches must run concurrently (e.g. one thread each) for their requests to be batched
+    """
+
+    def __init__(self, server, *args, **kwargs):
+        """
+        Attributes:
+            server (PolicyServer): The (started) server deciding the actions
+
+        Other arguments are the same as ```Team```
+        """
+        super().__init__(*args, **kwargs)
+        self.server = server
+        self.server.register()
+
+    def move_batch(self, observation):
+        """
+        Send the observation to the server and play the actions it decided
+        """
+        self.actions[:] = self.server.request(observation.vector())
+        return super().move_batch(observation)
+
+    def close(self):
+        """
+        Stop sending requests (call it when the match ends so that the other matches are not delayed)
+        """
+        self.server.unregister()
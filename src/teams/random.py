@@ -3,9 +3,19 @@ Create a random team i.e. team where each agent takes a random action (used for
 """
 
 from settings import *
-from const import ACT,FORM
+from const import Action, ACT_DTYPE, ACT_IS_MOVE, ACT_IS_SHOT, FORM
 from teams.agent import Agent
 from teams.team import Team
+from itertools import accumulate
+import numpy as np
+
+MOVE_PROB = 0.6  # Probability of moving (otherwise the agent shoots)
+MOVES = [a for a in Action if ACT_IS_MOVE[a]]
+SHOTS = [a for a in Action if ACT_IS_SHOT[a]]
+
+# Same distribution as ```RandomAgent.move()``` for a single call to random.choices()
+CHOICES = [int(a) for a in MOVES + SHOTS]
+CUM_WEIGHTS = list(accumulate([MOVE_PROB/len(MOVES)]*len(MOVES) + [(1 - MOVE_PROB)/len(SHOTS)]*len(SHOTS)))
 
 
 class RandomAgent(Agent):
@@ -17,10 +27,10 @@ class RandomAgent(Agent):
         """
         Move the agent randomly
         """
-        if random.random() < 0.6:
-            return random.choice(['MOVE_U', 'MOVE_D', 'MOVE_L', 'MOVE_R'])
+        if random.random() < MOVE_PROB:
+            return random.choice(MOVES)
         else:
-            return random.choice(['SHOOT_Q', 'SHOOT_W', 'SHOOT_E', 'SHOOT_A', 'SHOOT_D', 'SHOOT_Z', 'SHOOT_X', 'SHOOT_C'])
+            return random.choice(SHOTS)
 
 
 class RandomTeam(Team):
@@ -43,3 +53,9 @@ class RandomTeam(Team):
         for i, player in enumerate(self.players):
             actions.append(player.move(state_prev, state, reward))
         return actions
+
+    def move_batch(self, observation):
+        """
+        Move every player randomly in one call
+        """
+        return np.array(random.choices(CHOICES, cum_weights=CUM_WEIGHTS, k=len(self.players)), dtype=ACT_DTYPE)
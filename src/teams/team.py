@@ -7,8 +7,36 @@ Override the ```set_players``` and ```move``` method to create a valid custom te
 """
 
 from settings import *
-from const import recolor
+from const import FORM, Action, ACT_DTYPE, action_codes, recolor
 from abc import ABC, abstractmethod
+import numpy as np
+
+FORM_MIN_DIST = 2  # A player within this distance (along both axes) of his formation position has arrived
+
+
+def form_choices(near_x, near_y, right, below):
+    """
+    Actions that take a player closer to his formation position (one is chosen at random)
+
+    Attributes:
+        near_x, near_y (bool): Whether the player is in-line horizontally / vertically
+        right, below (bool): Whether the player is to the right / below his position
+    """
+    horizontal = Action.MOVE_L if right else Action.MOVE_R
+    vertical = Action.MOVE_U if below else Action.MOVE_D
+    if near_x and near_y:
+        return [Action.NOTHING]
+    elif near_x:
+        return [vertical]
+    elif near_y:
+        return [horizontal]
+    return [horizontal, vertical]
+
+
+# Indexed by 8*near_x + 4*near_y + 2*right + below (see ```Team.formation_dirs```)
+FORM_TABLE = [form_choices(*[bool(code & bit) for bit in (8, 4, 2, 1)]) for code in range(16)]
+NEAR_BITS = np.array([8, 4])
+AWAY_BITS = np.array([2, 1])
 
 
 class Team(ABC):
@@ -31,6 +59,7 @@ class Team(ABC):
         self.formation = formation
         self.maintain_formation = True
         self.ids = ids
+        self.dists = None  # Distance cache shared by the game (see ```distances.py```)
 
     def __str__(self):
         s = f'Team {self.id}:'
@@ -59,9 +88,52 @@ class Team(ABC):
         else:
             self.goal_x = W
 
+        self.compile_formation()
         self.set_players(self.ids)
+        self.index = {player.id: i for i, player in enumerate(self.players)}  # Position of each player (by id) in players
         self.set_color()
 
+    def compile_formation(self):
+        """
+        Precompute the team's formation (for its direction), all arrays are indexed by player id
+
+        - ```form_anchor```: The fixed positions from ```FORM``` (used when the ball is at the center)
+        - ```form_grid```: The positions for every ball position on a ```FORM_GRID``` grid laid over the field
+        - ```form_pos```: The current targets of the players (see ```shift_formation()```, called by the game every frame)
+        """
+        self.form_anchor = np.array([(pt['coord'].x, pt['coord'].y) for pt in FORM[self.formation][self.dir]], dtype=float)
+
+        ball = np.stack(np.meshgrid(np.linspace(0, W, FORM_GRID.x), np.linspace(0, H, FORM_GRID.y)), axis=-1)
+        offset = (ball - (W/2, H/2))[:, :, None, :]  # shape: (y, x, 1, 2)
+
+        grid = self.form_anchor + offset*(FORM_SHIFT.x, FORM_SHIFT.y)
+        grid[..., 0] = np.clip(grid[..., 0], PLAYER_RADIUS, W - PLAYER_RADIUS)
+        grid[..., 1] = np.clip(grid[..., 1], PLAYER_RADIUS, H - PLAYER_RADIUS)
+
+        # Keeper
+        grid[:, :, 0, 0] = self.form_anchor[0, 0]
+        grid[:, :, 0, 1] = np.clip(self.form_anchor[0, 1] + FORM_GK_SHIFT*offset[:, :, 0, 1], GOAL_POS[0]*H, GOAL_POS[1]*H)
+
+        self.form_grid = grid.reshape(FORM_GRID.y, FORM_GRID.x, -1)  # (y, x, 2*players)
+        self.form_pos = self.form_anchor.copy()
+
+    def shift_formation(self, pos):
+        """
+        Move the formation's targets with the ball
+
+        Bilinear interpolation between the 4 precomputed grid positions surrounding the ball
+
+        Attributes:
+            pos (P): The ball's position
+        """
+        fx = min(max(pos.x/W, 0), 1)*(FORM_GRID.x - 1)
+        fy = min(max(pos.y/H, 0), 1)*(FORM_GRID.y - 1)
+        i, j = min(int(fx), FORM_GRID.x - 2), min(int(fy), FORM_GRID.y - 2)
+        tx, ty = fx - i, fy - j
+
+        weights = np.array([(1 - tx)*(1 - ty), tx*(1 - ty), (1 - tx)*ty, tx*ty])
+        self.form_pos = (weights @ self.form_grid[j:j+2, i:i+2].reshape(4, -1)).reshape(-1, 2)
+
     def set_color(self):
         """
         Recolor the sprites using this team's color
@@ -76,6 +148,8 @@ class Team(ABC):
         Set the teams formation
         """
         self.formation = formation
+        if hasattr(self, 'dir'):
+            self.compile_formation()
 
     def formation_toggle(self):
         """
@@ -83,6 +157,73 @@ class Team(ABC):
         """
         self.maintain_formation = not self.maintain_formation
 
+    def select_player(self, ball):
+        """
+        Select a player based on the balls position
+
+        **Working**:
+
+        - If ball is near the D-area, keeper gets automatic control
+        - Otherwise the player nearest to the ball has control (ties are broken randomly)
+
+        Uses the game's distance cache when available
+        """
+        if not self.players:
+            return
+        if self.dists is not None:
+            dists = [d + player.rnd for d, player in zip(self.dists.ball[self.id], self.players)]
+        else:
+            dists = [player.pos.dist(ball.pos) + player.rnd for player in self.players]
+        # Default - Ball goes to nearest player
+        self.selected = dists.index(min(dists))
+
+        if min(dists) > PLAYER_RADIUS + BALL_RADIUS and abs(ball.pos.x - self.goal_x) < W//5 and 0 in self.index:
+            # If the ball is within the D and is not very near to any other player, give control to the keeper
+            self.selected = self.index[0]
+
+    @property
+    def selected_id(self):
+        """
+        Id of the selected player (-1 if none)
+        """
+        selected = getattr(self, 'selected', -1)
+        return self.players[selected].id if 0 <= selected < len(self.players) else -1
+
+    def formation_dirs(self, idx):
+        """
+        Send players (with the given indices) to their designated places in the formation
+
+        **Working**:
+
+        - If player is in-line (horizontally or vertically), move directly towards original point (U/L/D/R)
+        - Otherwise choose 2 directions that take you closer to the original point and choose one of them randomly (UL/UR/DL/DR)
+
+        The offsets of all the players are computed at once and mapped to actions through ```FORM_TABLE```
+
+        Returns a list of ```Action``` (in the same order as ```idx```)
+        """
+        if not idx:
+            return []
+        players = [self.players[i] for i in idx]
+        diff = np.array([(player.pos.x, player.pos.y) for player in players], dtype=float)
+        diff -= self.form_pos[[player.id for player in players]]
+        codes = np.dot(np.abs(diff) <= FORM_MIN_DIST, NEAR_BITS) + np.dot(diff > FORM_MIN_DIST, AWAY_BITS)
+
+        actions = []
+        for player, code in zip(players, codes.tolist()):
+            choices = FORM_TABLE[code]
+            if len(choices) == 1:
+                actions.append(choices[0])  # Action.NOTHING once arrived (code >= 12)
+            else:
+                actions.append(random.choice(choices))
+        return actions
+
+    def formation_dir(self, id):
+        """
+        Send player (with the given ID) to his designated place in the formation (see ```formation_dirs```)
+        """
+        return self.formation_dirs([id])[0]
+
     def draw(self, win, cam, debug=False):
         """
         Draw the team
@@ -92,15 +233,15 @@ class Team(ABC):
         for player in self.players:
             player.draw(win, cam, team_id=self.id, debug=debug)
 
-    def update(self, action, ball):
+    def update(self, action, ball, dt=1):
         """
         Update the team's state
 
-        Basically calls each players' ```update()``` method
+        Basically calls each players' ```update()``` method (actions are ```Action``` codes, see ```Game.move_next()```)
         """
 
         for i, player in enumerate(self.players):
-            player.update(action[i], self.players)
+            player.update(action[i], self.players, dt)
 
     @abstractmethod
     def set_players(self, ids=list(range(NUM_TEAM))):
@@ -119,6 +260,21 @@ class Team(ABC):
         """
         pass
 
+    def move_batch(self, observation):
+        """
+        Decide the actions of every player in one call (the game calls this instead of ```move()```)
+
+        Override it to decide all the players at once (e.g. a vectorized AI or a neural policy),
+        by default it calls ```move()``` with the game's state objects
+
+        Attributes:
+            observation (TeamObservation): The game seen by this team (see ```observation.py```)
+
+        Returns an array of ```Action``` codes (one for each player, of type ```ACT_DTYPE```)
+        """
+        actions = self.move(observation.state_prev, observation.state, observation.reward)
+        return np.array(action_codes(actions), dtype=ACT_DTYPE)
+
     @abstractmethod
     def move(self, state_prev, state, reward):
         """
@@ -130,5 +286,6 @@ class Team(ABC):
             reward (list): Reward returned from this state (Not implemented)
 
         Should return a list of valid actions (in the same order as each of the players)
+        i.e. ```Action``` codes (the names in ```ACT``` are also accepted)
         """
         pass
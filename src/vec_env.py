@@ -0,0 +1,278 @@
+"""
+Vectorized environment (for training agents)
+
+Runs many games in worker processes, the agent being trained controls team 1 (an ```ExternalTeam```) of every game.
+Observations, rewards, episode ends and actions are exchanged through preallocated shared memory
+(```multiprocessing.shared_memory```), the pipes to the workers only carry short commands (the ids of the games to step)
+
+Two modes are supported:
+
+- 'sync': ```step()``` steps every game and waits for all of them
+- 'async': ```send()``` steps some of the games and ```recv()``` returns those of the workers that finished first
+
+Rewards are the change in goal difference (1 when team 1 scores, -1 when it concedes).
+Episodes last ```VEC_ENV_FRAMES``` frames, the game is then restarted and its first observation is returned
+"""
+
+from settings import *
+from const import ACT_DTYPE
+from game import Game
+from observation import TeamObservation, vector_size
+from teams.external import ExternalTeam
+from teams.original_ai import OriginalAITeam
+from multiprocessing import Pipe, Process
+from multiprocessing.connection import wait
+from multiprocessing.shared_memory import SharedMemory
+import numpy as np
+
+MODES = ['sync', 'async']
+
+
+def layout(num_games, num_players, obs_size):
+    """
+    Name, shape and dtype of each array in the shared buffer (in order)
+    """
+    return [
+        ('obs', (num_games, obs_size), np.float32),
+        ('reward', (num_games,), np.float32),
+        ('done', (num_games,), np.bool_),
+        ('actions', (num_games, num_players), ACT_DTYPE),
+    ]
+
+
+def arrays(buf, num_games, num_players, obs_size):
+    """
+    NumPy views of the arrays in the shared buffer (name: array)
+    """
+    views, offset = {}, 0
+    for name, shape, dtype in layout(num_games, num_players, obs_size):
+        views[name] = np.ndarray(shape, dtype=dtype, buffer=buf, offset=offset)
+        offset += views[name].nbytes
+    return views
+
+
+def buffer_size(num_games, num_players, obs_size):
+    """
+    Size (in bytes) of the shared buffer
+    """
+    return sum(int(np.prod(shape))*np.dtype(dtype).itemsize
+               for _, shape, dtype in layout(num_games, num_players, obs_size))
+
+
+class Match:
+    """
+    A game played by a worker (along with what is needed to compute its rewards)
+    """
+
+    def __init__(self, opponent, difficulty):
+        """
+        Attributes:
+            opponent (class): Team class of team 2
+            difficulty (float): Game difficulty (0-1)
+        """
+        self.game = Game(ExternalTeam(), opponent(), sound=False, difficulty=difficulty)
+        self.kickoff = self.game.save_state()
+        self.frames = 0
+        self.goal_diff = 0
+
+    def reset(self):
+        """
+        Restart the match from the kick-off (creating a new game is much slower as it recolors every sprite)
+        """
+        rng = random.getstate()
+        self.game.load_state(self.kickoff)
+        random.setstate(rng)  # Episodes must not replay the same random numbers
+        self.frames = 0
+        self.goal_diff = 0
+
+    def step(self, actions):
+        """
+        Play 1 frame with the given actions for team 1
+
+        Returns (reward, done)
+        """
+        self.game.team1.actions[:] = actions
+        self.game.next()
+        self.frames += 1
+
+        goals = self.game.stats.goals
+        reward, self.goal_diff = goals[1] - goals[2] - self.goal_diff, goals[1] - goals[2]
+        return reward, self.frames >= VEC_ENV_FRAMES
+
+    def observe(self, out):
+        """
+        Write the observation of team 1 into the given row of the shared buffer
+        """
+        TeamObservation(self.game, 1).vector(out)
+
+
+def worker(pipe, shm_name, shape, ids, opponent, difficulty, seed):
+    """
+    Run the games with the given ids (the target of each worker process)
+
+    Commands received through the pipe are ```(command, ids)``` where command is 'reset', 'step' or 'close',
+    the ids of the games that were updated are sent back
+    """
+    random.seed(seed)
+    shm = SharedMemory(name=shm_name)
+    buf = arrays(shm.buf, *shape)
+    matches = {}
+
+    try:
+        while True:
+            cmd, todo = pipe.recv()
+            if cmd == 'close':
+                break
+            for i in todo:
+                if i not in matches:
+                    matches[i] = Match(opponent, difficulty)
+                if cmd == 'reset':
+                    matches[i].reset()
+                    buf['reward'][i], buf['done'][i] = 0, False
+                else:
+                    buf['reward'][i], buf['done'][i] = matches[i].step(buf['actions'][i])
+                    if buf['done'][i]:
+                        matches[i].reset()
+                matches[i].observe(buf['obs'][i])
+            pipe.send(todo)
+    except (EOFError, KeyboardInterrupt):
+        pass
+    finally:
+        del buf
+        shm.close()
+
+
+class VecEnv:
+    """
+    Many games stepped in parallel by worker processes
+    """
+
+    def __init__(self, num_games, num_workers=None, mode='sync', opponent=OriginalAITeam, difficulty=0.6, seed=0):
+        """
+        Start the workers and allocate the shared buffer
+
+        Attributes:
+            num_games (int): Number of games
+            num_workers (int): Number of worker processes (defaults to the number of cores, at most ```num_games```)
+            mode (str): One of ```MODES```
+            opponent (class): Team class of team 2 (must be importable by the workers)
+            difficulty (float): Game difficulty (0-1)
+            seed (int): Seed of the workers' random number generators (worker i uses seed + i)
+
+        The games are split evenly between the workers
+        """
+        if mode not in MODES:
+            raise Exception(f'Unknown mode {mode} (must be one of {MODES})')
+
+        self.mode = mode
+        self.num_games = num_games
+        self.num_workers = min(num_workers or os.cpu_count() or 1, num_games)
+        self.num_players = NUM_TEAM
+        self.obs_size = vector_size(NUM_TEAM, NUM_TEAM)
+        shape = (num_games, self.num_players, self.obs_size)
+
+        self.shm = SharedMemory(create=True, size=buffer_size(*shape))
+        self.buf = arrays(self.shm.buf, *shape)
+        self.obs, self.reward, self.done, self.actions = [self.buf[k] for k in ('obs', 'reward', 'done', 'actions')]
+
+        self.games = [list(range(num_games))[w::self.num_workers] for w in range(self.num_workers)]
+        self.worker_of = {i: w for w, ids in enumerate(self.games) for i in ids}
+        self.pipes, self.procs = [], []
+        for w, ids in enumerate(self.games):
+            parent, child = Pipe()
+            proc = Process(target=worker, args=(child, self.shm.name, shape, ids, opponent, difficulty, seed + w),
+                           daemon=True)
+            proc.start()
+            child.close()
+            self.pipes.append(parent)
+            self.procs.append(proc)
+        self.busy = set()  # Workers that were sent a command and have not replied yet
+
+    def command(self, cmd, ids):
+        """
+        Send a command concerning the given games to their workers
+        """
+        todo = {}
+        for i in ids:
+            todo.setdefault(self.worker_of[i], []).append(i)
+        for w, worker_ids in todo.items():
+            if w in self.busy:
+                raise Exception(f'Worker {w} is still stepping its games (call recv() first)')
+            self.pipes[w].send((cmd, worker_ids))
+            self.busy.add(w)
+
+    def recv(self, wait_all=False, timeout=None):
+        """
+        Wait for the workers that are stepping games
+
+        Attributes:
+            wait_all (bool): Wait for all of them (by default, returns as soon as one of them is done)
+            timeout (float): Maximum time to wait (in seconds, ignored with wait_all), no games are returned if none finished
+
+        Returns (obs, reward, done, ids) for the games that were updated (copies of the shared arrays)
+        """
+        if not self.busy:
+            raise Exception('No games are being stepped')
+        ids = []
+        while self.busy:
+            pending = {self.pipes[w]: w for w in self.busy}
+            for pipe in wait(list(pending), None if wait_all else timeout):
+                ids += pipe.recv()
+                self.busy.discard(pending[pipe])
+            if not wait_all:
+                break
+        ids = np.array(sorted(ids), dtype=int)
+        return self.obs[ids], self.reward[ids], self.done[ids], ids
+
+    def send(self, actions, ids=None):
+        """
+        Start stepping the given games (asynchronously) with the given actions
+
+        Attributes:
+            actions (np.array): Actions of team 1 in each of the games (shape (len(ids), players))
+            ids (list): The games to step (defaults to every game)
+        """
+        ids = range(self.num_games) if ids is None else ids
+        self.actions[list(ids)] = actions
+        self.command('step', ids)
+
+    def reset(self):
+        """
+        Restart every game
+
+        Returns the observations of every game (a view of the shared buffer)
+        """
+        if self.busy:
+            self.recv(wait_all=True)
+        self.command('reset', range(self.num_games))
+        self.recv(wait_all=True)
+        return self.obs
+
+    def step(self, actions):
+        """
+        Step every game with the given actions and wait for all of them (only in 'sync' mode)
+
+        Attributes:
+            actions (np.array): Actions of team 1 in each game (shape (games, players))
+
+        Returns (obs, reward, done) of every game (views of the shared buffer, valid until the next step)
+        """
+        if self.mode != 'sync':
+            raise Exception('step() is only available in sync mode (use send() and recv())')
+        self.send(actions)
+        self.recv(wait_all=True)
+        return self.obs, self.reward, self.done
+
+    def close(self):
+        """
+        Stop the workers and free the shared buffer (arrays returned earlier must not be used afterwards)
+        """
+        if self.busy:
+            self.recv(wait_all=True)
+        for pipe in self.pipes:
+            pipe.send(('close', []))
+        for proc in self.procs:
+            proc.join()
+        self.obs = self.reward = self.done = self.actions = self.buf = None
+        self.shm.close()
+        self.shm.unlink()